@@ -1,26 +1,79 @@
 import os
+import copy
 import json
 
+try:
+    import orjson  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - 環境依存
+    orjson = None
+
 APP_VERSION = "0.7"
 
 CONFIG_FILE = os.path.join(os.getcwd(), "drum_app_config.json")
 
+# 読み込み済み設定のキャッシュ（ファイルの更新時刻が変わらない限り再パースしない）
+_CACHE: dict = {}
+
+
+def _dumps(config: dict) -> bytes:
+    """設定 → UTF-8 の JSON バイト列（orjson があればそちらを使う。手で編集できるよう字下げは 2）"""
+    if orjson is not None:
+        # dyn_gain のように int キーの dict があるので OPT_NON_STR_KEYS を付ける（json と同じく文字列キーになる）
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(config, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def _loads(raw: bytes) -> dict:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
 
 def load_config() -> dict:
     """設定ファイルの読み込み（なければ空dict）"""
-    if not os.path.exists(CONFIG_FILE):
+    try:
+        mtime = os.stat(CONFIG_FILE).st_mtime_ns
+    except OSError:
         return {}
+
+    if _CACHE.get("mtime") == mtime:
+        return copy.deepcopy(_CACHE["data"])
+
     try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(CONFIG_FILE, "rb") as f:
+            raw = f.read()
+        data = _loads(raw)
     except Exception:
         return {}
 
+    _CACHE["mtime"] = mtime
+    _CACHE["data"] = data
+    # 読み込んだバイト列も覚えておき、同じ内容の save_config は書き込まずに済ませる
+    _CACHE["raw"] = raw
+    return copy.deepcopy(data)
+
 
 def save_config(config: dict):
-    """設定ファイルの保存"""
+    """設定ファイルの保存（内容が前回と同じなら書き込まない）"""
     try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+        raw = _dumps(config)
+        if raw == _CACHE.get("raw") and _CACHE.get("mtime") is not None:
+            try:
+                if os.stat(CONFIG_FILE).st_mtime_ns == _CACHE["mtime"]:
+                    return
+            except OSError:
+                pass
+
+        # 一時ファイルに書いてから置き換え、書き込み途中で落ちても設定が壊れないようにする
+        tmp_path = CONFIG_FILE + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(raw)
+        os.replace(tmp_path, CONFIG_FILE)
+
+        # 書き込んだ内容をキャッシュし、次回の読み込みでファイルを読まずに済ませる
+        # （JSON を経由させて、int キーが文字列になる等ファイルから読んだ時と同じ形にそろえる）
+        _CACHE["mtime"] = os.stat(CONFIG_FILE).st_mtime_ns
+        _CACHE["data"] = _loads(raw)
+        _CACHE["raw"] = raw
     except Exception:
         pass
@@ -1,6 +1,60 @@
 # draw_mixin.py
 import tkinter as tk
-from typing import List
+import tkinter.font as tkfont
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+
+# 音価判定のしきい値: (length_steps / ppb) の境界値を 32 倍した整数
+_NOTE_TYPE_RATIOS_X32 = (
+    (112, "whole"),        # 3.5
+    (48, "half"),          # 1.5
+    (24, "quarter"),       # 0.75
+    (12, "eighth"),        # 0.375
+    (6, "sixteenth"),      # 0.1875
+    (3, "thirtysecond"),   # 0.09375
+)
+
+# 音符種別 → 旗の本数（表に無いもの＝64分は 4 本）
+_NOTE_FLAGS = {"quarter": 0, "eighth": 1, "sixteenth": 2, "thirtysecond": 3}
+
+
+@lru_cache(maxsize=256)
+def _classify_note_type(length_steps: int, ppb: int) -> str:
+    """
+    音価 → 音符種別。(長さ, PPB) が同じなら結果も同じなのでキャッシュする。
+    length_steps * 32 と整数比較するので、割り算は不要。
+    """
+    if ppb <= 0:
+        return "quarter"
+    scaled = length_steps * 32
+    for ratio_x32, name in _NOTE_TYPE_RATIOS_X32:
+        if scaled >= ratio_x32 * ppb:
+            return name
+    return "sixtyfourth"
+
+
+class _NoteGeometry(NamedTuple):
+    head_w: float
+    head_h: float
+    stem_height: float
+    flag_length: float
+    flag_gap: float
+
+
+@lru_cache(maxsize=32)
+def _note_geometry(step_width: float) -> _NoteGeometry:
+    """ステップ幅から音符の符頭・符幹・旗の寸法を求める（描き直しのたびに同じ値になる）。"""
+    head_w = min(step_width * 0.8, 18)
+    head_h = head_w * 0.7
+    return _NoteGeometry(
+        head_w=head_w,
+        head_h=head_h,
+        stem_height=head_h * 3.0,
+        flag_length=head_w * 1.1,
+        flag_gap=head_h * 0.4,
+    )
 
 
 class ScoreDrawMixin:
@@ -12,58 +66,138 @@ class ScoreDrawMixin:
       - self.window_width, self.window_height
       - self.margin_left, self.margin_right, self.margin_top, self.margin_bottom
       - self.TIME_AREA_WIDTH
-      - self.track_mute_buttons
+      - self.track_mute_buttons, self.track_mute_window_ids
       - self.current_filename
+      - self.highlight_line_id（ハイライト用の矩形。hidden 状態で 1 度だけ作成しておく）
+      - 描画の状態（DrumApp.__init__ で初期化しておく）:
+          self._dirty_layers (set), self._batch_depth (0), self._grid_key, self._fonts (dict),
+          self._step_xs_cache, self._events_layout, self._track_signatures,
+          self._pending_highlight, self._highlight_idle_id, self._highlight_coords（以上 None）,
+          self._highlight_visible (False)
+
+    描画した item は "grid" / "events" のタグでレイヤー分けしておき、
+    mark_dirty() で指定したレイヤーだけを redraw_dirty() で描き直す。
     """
 
+    # キャンバス上のレイヤー（= item に付けるタグ）
+    #   grid   … 枠線・グリッド・タイトル・拍/小節番号など
+    #   events … 音符・休符とイベントの帯
+    _LAYERS = ("grid", "events")
+
+    # events レイヤーの見た目（スタイルのタグ → オプション。_apply_event_styles でまとめて設定する）
+    #   bar_note / bar_rest … イベントの帯
+    #   stroke              … 符幹・旗・休符の線
+    #   head_filled / head_open … 符頭（黒 / 白抜き）
+    #   rest_block          … 休符の塗りつぶし部分
+    #   dyn_text            … 強弱記号（フォントは _font から取るので _apply_event_styles で設定）
+    _EVENT_STYLES = {
+        "bar_note": {"width": 4, "fill": "#cccccc"},
+        "bar_rest": {"width": 4, "fill": "#dddddd"},
+        "stroke": {"width": 2, "fill": "black"},
+        "head_filled": {"width": 2, "fill": "black", "outline": "black"},
+        "head_open": {"width": 2, "fill": "white", "outline": "black"},
+        "rest_block": {"fill": "black", "outline": "black"},
+    }
+
     def redraw_all(self):
-        # 以前のミュートボタンを削除
-        for btn in self.track_mute_buttons:
-            try:
-                btn.destroy()
-            except Exception:
-                pass
-        self.track_mute_buttons.clear()
+        """全レイヤーを描き直す（譜面の読み込み時・リサイズ時など）。"""
+        self.mark_dirty(*self._LAYERS)
+        self.redraw_dirty()
+
+    def mark_dirty(self, *layers: str):
+        """次の redraw_dirty() で描き直すレイヤーを登録する。"""
+        self._dirty_layers.update(layers)
+
+    @contextmanager
+    def batch_updates(self):
+        """
+        ブロック内では redraw_all() / redraw_dirty() を保留し、抜けた時に 1 回だけ描き直す。
+        入れ子にしてもよい（一番外側を抜けた時に描き直す）。
+        """
+        self._batch_depth += 1
+        try:
+            yield
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self.redraw_dirty()
+
+    def redraw_dirty(self):
+        """
+        変更のあったレイヤーだけを消して描き直す。
+        events は配置が前回と同じなら、イベントが変わったトラックだけを描き直す（redraw_changed_tracks）。
+        ハイライト矩形とミュートボタンの window item は使い回すので消さない。
+        batch_updates() の中では何もしない（dirty のまま残しておく）。
+        """
+        dirty = self._dirty_layers
+        if not dirty or self._batch_depth:
+            return
 
-        self.canvas.delete("all")
-        self.draw_bar_grid()
-        self.draw_tracks()
+        grid_redrawn = "grid" in dirty and self._grid_needs_redraw()
+        if grid_redrawn:
+            self.canvas.delete("grid")
+            self.draw_bar_grid()
+
+        events_kept = True
+        if "events" in dirty and not self.redraw_changed_tracks():
+            self.canvas.delete("events")
+            self.draw_tracks()
+            events_kept = False
+
+        if grid_redrawn and events_kept:
+            # 残っているイベントより後ろに回す
+            self.canvas.tag_lower("grid")
+
+        dirty.clear()
+        # ハイライトはグリッドより前・音符より後ろに置き、音符が隠れないようにする
+        if self.canvas.find_withtag("events"):
+            self.canvas.tag_lower("highlight", "events")
+        else:
+            self.canvas.tag_raise("highlight")
+
+    def _grid_needs_redraw(self) -> bool:
+        """
+        グリッド層（枠・小節線・タイトル・拍子・テンポ表記）は、譜面・キャンバスサイズ・
+        ファイル名のどれかが変わった時だけ描き直せばよい。前回描いた時と同じなら既存の item を残す。
+        譜面はその場で書き換えず差し替える前提なので、オブジェクトの同一性で比べる。
+        """
+        key = (self.score, self.window_width, self.window_height, self.current_filename)
+        prev = self._grid_key
+        if prev is not None and prev[0] is key[0] and prev[1:] == key[1:]:
+            return False
+        self._grid_key = key
+        return True
+
+    def _font(self, family: str, size: int, weight: str = "normal") -> tkfont.Font:
+        """
+        キャンバス文字用の名前付きフォント。描画のたびにフォント指定を Tcl に解釈させないよう、
+        (family, size, weight) ごとに 1 つだけ作って使い回す（破棄されないよう保持しておく）。
+        """
+        fonts = self._fonts
+        key = (family, size, weight)
+        font = fonts.get(key)
+        if font is None:
+            font = tkfont.Font(root=self.canvas, family=family, size=size, weight=weight)
+            fonts[key] = font
+        return font
 
     # ----------------------------
     # 音符種別判定
     # ----------------------------
     def _classify_note_type(self, length_steps: int) -> str:
-        ppb = self.score.pulses_per_beat
-        if ppb <= 0:
-            return "quarter"
-
-        ratio = length_steps / ppb
-
-        if ratio >= 3.5:
-            return "whole"
-        elif ratio >= 1.5:
-            return "half"
-        elif ratio >= 0.75:
-            return "quarter"
-        elif ratio >= 0.375:
-            return "eighth"
-        elif ratio >= 0.1875:
-            return "sixteenth"
-        elif ratio >= 0.09375:
-            return "thirtysecond"
-        else:
-            return "sixtyfourth"
+        return _classify_note_type(length_steps, self.score.pulses_per_beat)
 
     # ----------------------------
     # 音符記号の描画
     # ----------------------------
     def _draw_note_symbol(self, x_left: float, y: float,
                           length_steps: int, step_width: float,
-                          dynamic: str = "mf"):
+                          dynamic: str = "mf", tags=("events",)):
         note_type = self._classify_note_type(length_steps)
 
-        head_w = min(step_width * 0.8, 18)
-        head_h = head_w * 0.7
+        geom = _note_geometry(step_width)
+        head_w = geom.head_w
+        head_h = geom.head_h
         head_x_center = x_left + head_w * 0.6
         head_y_center = y
 
@@ -73,90 +207,62 @@ class ScoreDrawMixin:
                 head_y_center - head_h / 2,
                 head_x_center + head_w / 2,
                 head_y_center + head_h / 2,
-                fill="white",
-                outline="black",
-                width=2,
+                tags=tags + ("head_open",),
             )
             if dynamic != "mf":
                 self.canvas.create_text(
                     head_x_center,
                     head_y_center - head_h * 1.5,
                     text=dynamic,
-                    font=("Arial", 8),
-                    fill="black",
+                    tags=tags + ("dyn_text",),
                 )
             return
 
-        if note_type == "half":
-            fill_color = "white"
-        else:
-            fill_color = "black"
+        head_style = "head_open" if note_type == "half" else "head_filled"
 
         self.canvas.create_oval(
             head_x_center - head_w / 2,
             head_y_center - head_h / 2,
             head_x_center + head_w / 2,
             head_y_center + head_h / 2,
-            fill=fill_color,
-            outline="black",
-            width=2,
+            tags=tags + (head_style,),
         )
 
-        stem_height = head_h * 3.0
+        stem_height = geom.stem_height
         stem_x = head_x_center + head_w * 0.45
         stem_y_top = head_y_center - stem_height
         stem_y_bottom = head_y_center
 
-        self.canvas.create_line(
-            stem_x,
-            stem_y_bottom,
-            stem_x,
-            stem_y_top,
-            width=2,
-            fill="black",
-        )
-
-        if note_type == "quarter":
-            n_flags = 0
-        elif note_type == "eighth":
-            n_flags = 1
-        elif note_type == "sixteenth":
-            n_flags = 2
-        elif note_type == "thirtysecond":
-            n_flags = 3
-        else:
-            n_flags = 4
+        # 符幹と旗は 1 本の折れ線にまとめる。
+        # 旗を描いたら同じ線をなぞって符幹へ戻り、符幹をなぞって次の旗の付け根へ下りる
+        # （重なる部分は同じ色・太さなので見た目は変わらない）。
+        n_flags = _NOTE_FLAGS.get(note_type, 4)
 
-        flag_length = head_w * 1.1
+        flag_length = geom.flag_length
+        flag_gap = geom.flag_gap
+        points = [stem_x, stem_y_bottom, stem_x, stem_y_top]
         for i in range(n_flags):
-            offset = i * (head_h * 0.4)
-            y0 = stem_y_top + offset
-            y1 = y0 + head_h * 0.4
-            x0 = stem_x
-            x1 = stem_x + flag_length
-            self.canvas.create_line(
-                x0,
-                y0,
-                x1,
-                y1,
-                width=2,
-                fill="black",
-            )
+            y0 = stem_y_top + i * flag_gap
+            if i:
+                points.extend((stem_x, y0))
+            points.extend((stem_x + flag_length, y0 + flag_gap))
+            if i < n_flags - 1:
+                points.extend((stem_x, y0))
+        self.canvas.create_line(*points, tags=tags + ("stroke",))
 
         if dynamic != "mf":
             self.canvas.create_text(
                 head_x_center,
                 head_y_center - head_h * 1.5,
                 text=dynamic,
-                font=("Arial", 8, "normal"),
-                fill="black",
+                tags=tags + ("dyn_text",),
             )
 
     # ----------------------------
     # 休符記号の描画
     # ----------------------------
     def _draw_rest_symbol(self, x_left: float, y: float,
-                          length_steps: int, step_width: float):
+                          length_steps: int, step_width: float, tags=("events",)):
         note_type = self._classify_note_type(length_steps)
 
         span = length_steps * step_width
@@ -176,16 +282,14 @@ class ScoreDrawMixin:
                 line_y,
                 cx + rect_w * 0.8,
                 line_y,
-                width=2,
-                fill="black",
+                tags=tags + ("stroke",),
             )
             self.canvas.create_rectangle(
                 cx - rect_w * 0.5,
                 line_y,
                 cx + rect_w * 0.5,
                 line_y + rect_h,
-                fill="black",
-                outline="black",
+                tags=tags + ("rest_block",),
             )
             return
 
@@ -198,16 +302,14 @@ class ScoreDrawMixin:
                 line_y,
                 cx + rect_w * 0.8,
                 line_y,
-                width=2,
-                fill="black",
+                tags=tags + ("stroke",),
             )
             self.canvas.create_rectangle(
                 cx - rect_w * 0.5,
                 line_y - rect_h,
                 cx + rect_w * 0.5,
                 line_y,
-                fill="black",
-                outline="black",
+                tags=tags + ("rest_block",),
             )
             return
 
@@ -222,9 +324,7 @@ class ScoreDrawMixin:
             x2 = cx - base * 0.15
             x3 = cx + base * 0.22
 
-            self.canvas.create_line(x0, top_y, x1, mid1_y, width=2)
-            self.canvas.create_line(x1, mid1_y, x2, mid2_y, width=2)
-            self.canvas.create_line(x2, mid2_y, x3, bottom_y, width=2)
+            self.canvas.create_line(x0, top_y, x1, mid1_y, x2, mid2_y, x3, bottom_y, tags=tags + ("stroke",))
             return
 
         top_y = line_y - h * 0.9
@@ -237,18 +337,9 @@ class ScoreDrawMixin:
         x2 = cx - base * 0.12
         x3 = cx + base * 0.20
 
-        self.canvas.create_line(x0, top_y, x1, mid1_y, width=2)
-        self.canvas.create_line(x1, mid1_y, x2, mid2_y, width=2)
-        self.canvas.create_line(x2, mid2_y, x3, bottom_y, width=2)
+        self.canvas.create_line(x0, top_y, x1, mid1_y, x2, mid2_y, x3, bottom_y, tags=tags + ("stroke",))
 
-        if note_type == "eighth":
-            n_flags = 1
-        elif note_type == "sixteenth":
-            n_flags = 2
-        elif note_type == "thirtysecond":
-            n_flags = 3
-        else:
-            n_flags = 4
+        n_flags = _NOTE_FLAGS.get(note_type, 4)
 
         r = base * 0.13
         flag_x = x0
@@ -262,13 +353,33 @@ class ScoreDrawMixin:
                 cy - r,
                 flag_x + r,
                 cy + r,
-                fill="black",
-                outline="black",
+                tags=tags + ("rest_block",),
             )
 
     # ----------------------------
     # グリッド・トラック描画
     # ----------------------------
+    @staticmethod
+    def _append_zigzag(points: List[float], x: float, y_top: float, y_bottom: float):
+        """縦線 1 本分の座標を、上下交互に折り返す折れ線として points に追加する。"""
+        if len(points) % 8 == 0:
+            points.extend((x, y_top, x, y_bottom))
+        else:
+            points.extend((x, y_bottom, x, y_top))
+
+    def _tk_create_func(self):
+        """
+        Canvas.create_*() のオプション組み立て（dict → "-key value" 変換）を省き、
+        Tcl の "<canvas> create <type> coords... -option value..." を直接呼ぶ関数を返す。
+        """
+        call = self.canvas.tk.call
+        widget = str(self.canvas)
+
+        def tk_create(item_type: str, *args):
+            return call(widget, "create", item_type, *args)
+
+        return tk_create
+
     def draw_bar_grid(self):
         time_area_width = self.TIME_AREA_WIDTH
 
@@ -277,8 +388,8 @@ class ScoreDrawMixin:
         y_top = self.margin_top
         y_bottom = self.window_height - self.margin_bottom
 
-        self.canvas.create_line(x0, y_top, x1, y_top, width=2)
-        self.canvas.create_line(x0, y_bottom, x1, y_bottom, width=2)
+        self.canvas.create_line(x0, y_top, x1, y_top, width=2, tags=("grid", "grid_border"))
+        self.canvas.create_line(x0, y_bottom, x1, y_bottom, width=2, tags=("grid", "grid_border"))
 
         bar_width = x1 - x0
         total_steps = self.score.total_steps
@@ -291,14 +402,29 @@ class ScoreDrawMixin:
         bars = self.score.bars
 
         # ステップごとの縦線（拍・小節を強調）
-        for step in range(total_steps + 1):
-            x = x0 + step * step_width
+        # 細線・拍線はそれぞれ上下端で折り返す 1 本の折れ線にまとめ、Tk の item 数を減らす。
+        # 折り返し部分は上下の枠線と重なるので、最後に枠線を前面へ出して隠す。
+        fine_pts: List[float] = []
+        beat_pts: List[float] = []
+        bar_xs: List[float] = []
+        for step, x in enumerate(self._step_xs(x0, step_width, total_steps)):
             if bar_steps > 0 and step % bar_steps == 0:
-                self.canvas.create_line(x, y_top, x, y_bottom, width=3, fill="#000000")
+                bar_xs.append(x)
             elif pulses > 0 and step % pulses == 0:
-                self.canvas.create_line(x, y_top, x, y_bottom, width=1, fill="#888888")
+                self._append_zigzag(beat_pts, x, y_top, y_bottom)
             else:
-                self.canvas.create_line(x, y_top, x, y_bottom, width=1, fill="#eeeeee")
+                self._append_zigzag(fine_pts, x, y_top, y_bottom)
+
+        if fine_pts:
+            self.canvas.create_line(*fine_pts, width=1, fill="#eeeeee", tags="grid")
+        if beat_pts:
+            self.canvas.create_line(*beat_pts, width=1, fill="#888888", tags="grid")
+        # 小節線・拍カウント・小節番号は数が多いので、Tcl の create を直接呼ぶ
+        tk_create = self._tk_create_func()
+        bar_line_opts = ("-width", 3, "-fill", "#000000", "-tags", "grid")
+        for x in bar_xs:
+            tk_create("line", x, y_top, x, y_bottom, *bar_line_opts)
+        self.canvas.tag_raise("grid_border")
 
         beats_per_bar = self.score.beats_per_bar
 
@@ -311,15 +437,17 @@ class ScoreDrawMixin:
                 mid_x,
                 title_y,
                 text=self.score.title,
-                font=("Arial", 14, "bold"),
+                font=self._font("Arial", 14, "bold"),
+                tags="grid",
             )
             if self.current_filename:
                 self.canvas.create_text(
                     mid_x,
                     filename_y,
                     text=self.current_filename,
-                    font=("Arial", 9),
+                    font=self._font("Arial", 9),
                     fill="#555555",
+                    tags="grid",
                 )
         else:
             if self.current_filename:
@@ -327,47 +455,44 @@ class ScoreDrawMixin:
                     mid_x,
                     title_y,
                     text=self.current_filename,
-                    font=("Arial", 11, "bold"),
+                    font=self._font("Arial", 11, "bold"),
                     fill="#555555",
+                    tags="grid",
                 )
 
         # 拍カウント
+        beat_text_opts = ("-font", self._font("Arial", 10).name, "-tags", "grid")
         for bar_index in range(bars):
             for beat in range(beats_per_bar):
                 step_index = bar_index * bar_steps + (beat + 0.5) * pulses
                 if step_index > total_steps:
                     continue
                 beat_x = x0 + step_index * step_width
-                self.canvas.create_text(
-                    beat_x, y_top - 18, text=str(beat + 1), font=("Arial", 10)
-                )
+                tk_create("text", beat_x, y_top - 18, "-text", str(beat + 1), *beat_text_opts)
 
         # 小節番号
+        bar_text_opts = ("-font", self._font("Arial", 9, "bold").name, "-fill", "#444444", "-tags", "grid")
         for bar_index in range(bars):
             bar_start_step = bar_index * bar_steps
             bar_end_step = min((bar_index + 1) * bar_steps, total_steps)
             bar_center_step = (bar_start_step + bar_end_step) / 2
             bar_x = x0 + bar_center_step * step_width
-            self.canvas.create_text(
-                bar_x,
-                y_top - 30,
-                text=f"Bar {bar_index + 1}",
-                font=("Arial", 9, "bold"),
-                fill="#444444",
-            )
+            tk_create("text", bar_x, y_top - 30, "-text", f"Bar {bar_index + 1}", *bar_text_opts)
 
         num, den = self.score.time_signature
 
         ts_x = self.margin_left + 25
         ts_center_y = (y_top + y_bottom) / 2
-        self.canvas.create_text(ts_x, ts_center_y - 10, text=str(num), font=("Arial", 16, "bold"))
-        self.canvas.create_text(ts_x, ts_center_y + 10, text=str(den), font=("Arial", 16, "bold"))
+        ts_font = self._font("Arial", 16, "bold")
+        self.canvas.create_text(ts_x, ts_center_y - 10, text=str(num), font=ts_font, tags="grid")
+        self.canvas.create_text(ts_x, ts_center_y + 10, text=str(den), font=ts_font, tags="grid")
 
+        # トラックの区切り線（破線なので 1 本の折れ線にはまとめられない。Tcl の create を直接呼ぶ）
         n_tracks = len(self.score.tracks)
-        for i, _track in enumerate(self.score.tracks):
-            ratio = (i + 1) / (n_tracks + 1) if n_tracks > 0 else 0.5
-            y = y_top + (y_bottom - y_top) * ratio
-            self.canvas.create_line(x0, y, x1, y, width=1, dash=(2, 4), fill="#dddddd")
+        separator_opts = ("-width", 1, "-dash", (2, 4), "-fill", "#dddddd", "-tags", "grid")
+        for i in range(n_tracks):
+            y = y_top + (y_bottom - y_top) * ((i + 1) / (n_tracks + 1))
+            tk_create("line", x0, y, x1, y, *separator_opts)
 
         tempo_text = (
             f"TEMPO={self.score.tempo}, "
@@ -379,7 +504,8 @@ class ScoreDrawMixin:
             mid_x,
             y_bottom + 25,
             text=tempo_text,
-            font=("Arial", 10),
+            font=self._font("Arial", 10),
+            tags="grid",
         )
 
     def draw_tracks(self):
@@ -392,100 +518,266 @@ class ScoreDrawMixin:
         bar_width = x1 - x0
         total_steps = self.score.total_steps
         if total_steps <= 0:
+            self._destroy_mute_buttons()
+            self._events_layout = None
             return
         step_width = bar_width / total_steps
 
         n_tracks = len(self.score.tracks)
+        track_ys = self._track_ys(y_top, y_bottom, n_tracks)
 
         track_ctrl_x = self.margin_left + time_area_width - 5
 
+        xs = self._step_xs(x0, step_width, total_steps)
+        draw_events = self._draw_track_events
+
+        # トラック名の並びが前回と同じなら、ミュートボタンは作り直さず位置だけ動かす
+        track_names = [track.name for track in self.score.tracks]
+        reuse_buttons = [btn.cget("text") for btn in self.track_mute_buttons] == track_names
+        if not reuse_buttons:
+            self._destroy_mute_buttons()
+
         for t_index, track in enumerate(self.score.tracks):
-            if n_tracks > 0:
-                ratio = (t_index + 1) / (n_tracks + 1)
-            else:
-                ratio = 0.5
-            y = y_top + (y_bottom - y_top) * ratio
+            y = track_ys[t_index]
+            # 高さだけ変わった時にトラック単位で動かせるよう、トラック番号のタグも付ける
+            track_tags = ("events", f"track{t_index}")
 
             var = self.track_mute_vars.get(track.name)
             if var is None:
                 var = tk.BooleanVar(value=False)
                 self.track_mute_vars[track.name] = var
-            chk = tk.Checkbutton(
-                self.canvas,
-                text=track.name,
-                variable=var,
-                anchor="w",
-                padx=0,
-                pady=0,
-            )
-            self.track_mute_buttons.append(chk)
-            self.canvas.create_window(
-                track_ctrl_x,
-                y,
-                window=chk,
-                anchor="e",
-            )
-
-            for ev in track.events:
-                x_left = x0 + ev.start_step * step_width
-                x_right = x0 + (ev.start_step + ev.length_steps) * step_width
-
-                self.canvas.create_line(
-                    x_left,
-                    y,
-                    x_right,
+            if reuse_buttons:
+                chk = self.track_mute_buttons[t_index]
+                if chk.cget("variable") != str(var):
+                    chk.configure(variable=var)
+                self.canvas.coords(self.track_mute_window_ids[t_index], track_ctrl_x, y)
+            else:
+                chk = tk.Checkbutton(
+                    self.canvas,
+                    text=track.name,
+                    variable=var,
+                    anchor="w",
+                    padx=0,
+                    pady=0,
+                )
+                self.track_mute_buttons.append(chk)
+                window_id = self.canvas.create_window(
+                    track_ctrl_x,
                     y,
-                    width=4,
-                    fill="#dddddd" if ev.symbol == "rest" else "#cccccc",
+                    window=chk,
+                    anchor="e",
+                    tags="mute_ctrl",
                 )
+                self.track_mute_window_ids.append(window_id)
+
+            draw_events(track, y, xs, step_width, track_tags)
+
+        self._apply_event_styles()
+
+        # 次のリサイズで高さだけが変わった場合に、描き直さず移動で済ませるための情報
+        self._events_layout = (self.score, x0, x1, track_ys)
+        # 次に譜面を読み込んだ時に、変わったトラックだけ描き直すための情報
+        self._track_signatures = [self._track_signature(track) for track in self.score.tracks]
+
+    def _draw_track_events(self, track, y: float, xs: List[float], step_width: float,
+                           track_tags: Tuple[str, ...]):
+        """1 トラック分のイベントの帯と音符・休符を描く。"""
+        # イベントのループでは属性参照を避けてローカル変数経由で呼ぶ
+        # （小節数は最後のイベントの終端から決まるので、start + length は必ず xs の範囲に収まる）
+        create_line = self.canvas.create_line
+        draw_rest = self._draw_rest_symbol
+        draw_note = self._draw_note_symbol
+        rest_bar_tags = track_tags + ("bar_rest",)
+        note_bar_tags = track_tags + ("bar_note",)
+
+        for ev in track.events:
+            start = ev.start_step
+            length = ev.length_steps
+            is_rest = ev.symbol == "rest"
+            x_left = xs[start]
+            x_right = xs[start + length]
+
+            create_line(x_left, y, x_right, y, tags=rest_bar_tags if is_rest else note_bar_tags)
+
+            if is_rest:
+                draw_rest(x_left, y, length, step_width, track_tags)
+            else:
+                draw_note(x_left, y, length, step_width, ev.dynamic, track_tags)
+
+    def _apply_event_styles(self):
+        """
+        音符・休符の item は色・太さを付けずに作り、描き終えてからスタイルのタグごとに
+        itemconfigure で 1 回ずつ設定する（item ごとにオプションを渡さない）。
+        """
+        itemconfigure = self.canvas.itemconfigure
+        for style_tag, options in self._EVENT_STYLES.items():
+            itemconfigure(style_tag, **options)
+        itemconfigure("dyn_text", font=self._font("Arial", 8), fill="black")
+
+    @staticmethod
+    def _track_signature(track) -> Tuple[str, tuple]:
+        """トラックの見た目を決める情報（名前と各イベントの位置・長さ・記号・強弱）。"""
+        return (
+            track.name,
+            tuple((ev.start_step, ev.length_steps, ev.symbol, ev.dynamic) for ev in track.events),
+        )
+
+    def redraw_changed_tracks(self) -> bool:
+        """
+        譜面を差し替えた時用。配置（横幅・ステップ数・トラック名の並び・高さ）が前回と同じなら、
+        イベントが変わったトラックだけを消して描き直す。
+        描き直せたら True を返す。配置が変わっていれば False（呼び出し側で全トラックを描き直す）。
+        """
+        layout = self._events_layout
+        old_sigs = self._track_signatures
+        if layout is None or old_sigs is None:
+            return False
+        old_score, x0, x1, track_ys = layout
+
+        score = self.score
+        total_steps = score.total_steps
+        if total_steps <= 0 or total_steps != old_score.total_steps:
+            return False
+        if (x0, x1) != (self.margin_left + self.TIME_AREA_WIDTH, self.window_width - self.margin_right):
+            return False
+        y_top = self.margin_top
+        y_bottom = self.window_height - self.margin_bottom
+        if self._track_ys(y_top, y_bottom, len(score.tracks)) != track_ys:
+            return False
+
+        new_sigs = [self._track_signature(track) for track in score.tracks]
+        if [sig[0] for sig in new_sigs] != [sig[0] for sig in old_sigs]:
+            return False
+
+        step_width = (x1 - x0) / total_steps
+        xs = self._step_xs(x0, step_width, total_steps)
+        changed = False
+        for t_index, (old_sig, new_sig) in enumerate(zip(old_sigs, new_sigs)):
+            if old_sig == new_sig:
+                continue
+            tag = f"track{t_index}"
+            self.canvas.delete(tag)
+            self._draw_track_events(score.tracks[t_index], track_ys[t_index], xs, step_width, ("events", tag))
+            changed = True
+        if changed:
+            self._apply_event_styles()
+
+        self._events_layout = (score, x0, x1, track_ys)
+        self._track_signatures = new_sigs
+        return True
+
+    @staticmethod
+    def _track_ys(y_top: float, y_bottom: float, n_tracks: int) -> List[float]:
+        """各トラックの横線の y 座標（上下の枠の間を等分）。"""
+        return [y_top + (y_bottom - y_top) * ((i + 1) / (n_tracks + 1)) for i in range(n_tracks)]
+
+    def shift_tracks_to_height(self) -> bool:
+        """
+        キャンバスの高さだけが変わった時用。ステップ幅が同じなら音符・休符の形も同じなので、
+        作り直さずにトラックごとのタグで上下に move するだけにする。
+        動かせたら True を返す（呼び出し側は grid だけ描き直せばよい）。譜面や横幅が変わっていれば False。
+        """
+        layout = self._events_layout
+        if layout is None or "events" in self._dirty_layers:
+            return False
+        score, x0, x1, old_ys = layout
+        new_x0 = self.margin_left + self.TIME_AREA_WIDTH
+        new_x1 = self.window_width - self.margin_right
+        if score is not self.score or (x0, x1) != (new_x0, new_x1):
+            return False
 
-                if ev.symbol == "rest":
-                    self._draw_rest_symbol(
-                        x_left=x_left,
-                        y=y,
-                        length_steps=ev.length_steps,
-                        step_width=step_width,
-                    )
-                else:
-                    self._draw_note_symbol(
-                        x_left=x_left,
-                        y=y,
-                        length_steps=ev.length_steps,
-                        step_width=step_width,
-                        dynamic=ev.dynamic,
-                    )
+        y_top = self.margin_top
+        y_bottom = self.window_height - self.margin_bottom
+        new_ys = self._track_ys(y_top, y_bottom, len(old_ys))
+        for t_index, (old_y, new_y) in enumerate(zip(old_ys, new_ys)):
+            if new_y != old_y:
+                self.canvas.move(f"track{t_index}", 0, new_y - old_y)
+
+        track_ctrl_x = self.margin_left + self.TIME_AREA_WIDTH - 5
+        for window_id, y in zip(self.track_mute_window_ids, new_ys):
+            self.canvas.coords(window_id, track_ctrl_x, y)
+
+        self._events_layout = (score, x0, x1, new_ys)
+        return True
+
+    def _step_xs(self, x0: float, step_width: float, total_steps: int) -> List[float]:
+        """
+        ステップ境界 0..total_steps の x 座標の表。
+        グリッドとイベントで同じ表を使い、配置が変わらない間は作り直さない。
+        """
+        key = (x0, step_width, total_steps)
+        cached = self._step_xs_cache
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        xs = [x0 + step * step_width for step in range(total_steps + 1)]
+        self._step_xs_cache = (key, xs)
+        return xs
+
+    def _destroy_mute_buttons(self):
+        """ミュートボタンと、それを載せている window item を破棄する。"""
+        for btn in self.track_mute_buttons:
+            try:
+                btn.destroy()
+            except Exception:
+                pass
+        self.track_mute_buttons.clear()
+        self.track_mute_window_ids.clear()
+        self.canvas.delete("mute_ctrl")
 
     # ----------------------------
     # ハイライト
     # ----------------------------
     def highlight_step(self, step_index: int):
-        self.clear_highlight()
+        """
+        再生位置のハイライトを step_index に移す。
+        実際の移動はアイドル時に 1 回だけ行い、その間に来た要求は最後のものだけを反映する。
+        """
+        self._pending_highlight = step_index
+        if self._highlight_idle_id is None:
+            self._highlight_idle_id = self.canvas.after_idle(self._apply_highlight)
+
+    def _apply_highlight(self):
+        self._highlight_idle_id = None
+        step_index = self._pending_highlight
+        if step_index is None:
+            return
+        self.show_highlight_span(step_index, step_index + 1)
 
-        time_area_width = self.TIME_AREA_WIDTH
-        x0 = self.margin_left + time_area_width
+    def highlight_x_range(self, first_step: int, end_step: int) -> Optional[Tuple[float, float]]:
+        """ステップ first_step〜end_step（end は含まない）を覆うハイライトの左右の x 座標。ステップが無ければ None。"""
+        x0 = self.margin_left + self.TIME_AREA_WIDTH
         x1 = self.window_width - self.margin_right
-        y_top = self.margin_top
-        y_bottom = self.window_height - self.margin_bottom
-
-        bar_width = x1 - x0
         total_steps = self.score.total_steps
         if total_steps <= 0:
-            return
-        step_width = bar_width / total_steps
+            return None
+        step_width = (x1 - x0) / total_steps
 
-        x_left = x0 + step_index * step_width
-        x_right = x_left + step_width
+        x_left = x0 + first_step * step_width
+        return x_left, x_left + (end_step - first_step) * step_width
 
-        self.highlight_line_id = self.canvas.create_rectangle(
-            x_left,
-            y_top,
-            x_right,
-            y_bottom,
-            fill="#ffeeaa",
-            outline="",
-        )
+    def show_highlight_span(self, first_step: int, end_step: int):
+        """ハイライトを first_step〜end_step（end は含まない）の範囲に、すぐに表示する。"""
+        x_range = self.highlight_x_range(first_step, end_step)
+        if x_range is None:
+            self.clear_highlight()
+            return
+        x_left, x_right = x_range
+        y_top = self.margin_top
+        y_bottom = self.window_height - self.margin_bottom
+
+        # 毎ステップ作り直さず、既存の矩形を移動するだけにする。
+        # 表示中なら state は触らず、再生中の 1 ステップは coords の 1 回で済ませる
+        coords = (x_left, y_top, x_right, y_bottom)
+        if coords != self._highlight_coords:
+            self.canvas.coords(self.highlight_line_id, *coords)
+            self._highlight_coords = coords
+        if not self._highlight_visible:
+            self.canvas.itemconfigure(self.highlight_line_id, state="normal")
+            self._highlight_visible = True
 
     def clear_highlight(self):
-        if getattr(self, "highlight_line_id", None) is not None:
-            self.canvas.delete(self.highlight_line_id)
-            self.highlight_line_id = None
+        # まだ反映されていないハイライト要求も取り消す
+        self._pending_highlight = None
+        if self.highlight_line_id is not None and self._highlight_visible:
+            self.canvas.itemconfigure(self.highlight_line_id, state="hidden")
+            self._highlight_visible = False
@@ -1,41 +1,166 @@
 # exporter.py
-import wave
+import array
 import struct
-from typing import Callable, List
+import sys
+import threading
+import wave
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
 import tempfile
 import os
 
-from score import Score
+from score import Score, _DYN_LEVEL
 from synth import DrumSynth
 
+try:
+    import numpy as np  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - 環境依存
+    np = None
+
+try:
+    from numba import njit  # type: ignore
+except ModuleNotFoundError:  # pragma: no cover - 環境依存
+    njit = None
+
+
+# WAV 書き出し時のファイルバッファサイズ
+_WAV_WRITE_BUFFER = 1 << 20
+
+# True なら標準の wave モジュールで書き出す（ヘッダーを自前で組む経路の切り分け用）
+_USE_WAVE_MODULE = False
+
+# int16 変換用の作業バッファ（同じくらいの長さを繰り返し書き出す時に毎回確保し直さない）。
+# 書き出し後も残しておくのは _PCM_SCRATCH_KEEP サンプル以下の時だけにし、
+# 長い書き出しの後に大きな配列をプロセスの終了まで抱えたままにしない
+_pcm_scratch = None
+_pcm_scratch_lock = threading.Lock()
+_PCM_SCRATCH_KEEP = 1 << 21  # 4 MiB（44.1kHz で約 47 秒）
+
+# write_videofile に preset を渡すコーデック
+_PRESET_CODECS = frozenset({"libx264", "libx265"})
+
+
+if njit is not None and np is not None:
+
+    @njit(cache=True, fastmath=True)
+    def _mix_kernel(mix, combo_matrix, combo_len, step_keys, step_to_sample, active_steps):
+        """
+        1 ループ分の合成済み波形の加算を JIT コンパイルしたカーネル。
+        combo_matrix: (64, max_len) float32 / combo_len: (64,) int64
+        step_keys: (steps,) uint8 … (hh << 4) | (sd << 2) | bd
+        step_to_sample: (steps,) int64 / active_steps: 発音のあるステップ番号 int64
+        ステップ同士で書き込み先が重なるので、並列化（prange）はしない。
+        """
+        total_samples = mix.shape[0]
+        for idx in range(active_steps.shape[0]):
+            step = active_steps[idx]
+            key = step_keys[step]
+            start_sample = step_to_sample[step]
+            n = min(combo_len[key], total_samples - start_sample)
+            for k in range(n):
+                mix[start_sample + k] += combo_matrix[key, k]
+else:
+    _mix_kernel = None
+
 
 def dynamic_to_level(dyn: str) -> int:
     """
     強弱 → レベル変換
     pp/p -> 1, mp/mf -> 2, f/ff -> 3, それ以外は 2
     """
-    if dyn in ("pp", "p"):
-        return 1
-    if dyn in ("mp", "mf"):
-        return 2
-    if dyn in ("f", "ff"):
-        return 3
-    return 2
+    return _DYN_LEVEL.get(dyn, 2)
 
 
-def render_score_to_wav(
+def _build_step_levels(score: Score, total_steps: int) -> List[bytearray]:
+    """
+    HH / SD / BD の 3 トラックについて、ステップごとの強弱レベル表を作る。
+    levels[track_index][step] → 0（発音なし）〜 3
+    各行は 1 ステップ 1 バイトの bytearray（numpy 側へもコピー 1 回で渡せる）。
+    Track.onsets()（読み込み後 1 度だけ作られる）を引くだけなので、ステップ毎の線形探索が不要になる。
+    同じステップに複数のイベントがある場合は、従来の線形探索と同じく先頭のものを採用する。
+    """
+    levels = [bytearray(total_steps) for _ in range(3)]
+    for i, track in enumerate(score.tracks[:3]):
+        row = levels[i]
+        for step, ev in track.onsets().items():
+            # 範囲外のステップは従来どおり鳴らさない
+            if 0 <= step < total_steps:
+                row[step] = _DYN_LEVEL.get(ev.dynamic, 2)
+    return levels
+
+
+def _pack_step_keys(levels: List[bytearray]) -> bytes:
+    """HH / SD / BD のレベル行から、ステップごとに (hh << 4) | (sd << 2) | bd のキー列を作る。"""
+    hh_row, sd_row, bd_row = levels
+    return bytes((hh << 4) | (sd << 2) | bd for hh, sd, bd in zip(hh_row, sd_row, bd_row))
+
+
+def _build_combo_table(step_keys: bytes, track_waves, gain_table, max_len: int):
+    """
+    step_keys に現れる組み合わせキーごとに、HH / SD / BD をゲイン込みで足し合わせた波形を作る。
+    return: (combo_matrix, combo_len)
+      combo_matrix[key] … 合成済み波形（numpy があれば (64, max_len) float32 の行、無ければ array("d")）
+      combo_len[key]    … 有効なサンプル数（使われないキーは 0）
+    """
+    combo_len = [0] * 64
+    if np is not None:
+        combo_matrix = np.zeros((64, max_len), dtype=np.float32)
+    else:
+        combo_matrix = [None] * 64
+
+    for key in set(step_keys):
+        if key == 0:
+            continue
+        key_levels = (key >> 4, (key >> 2) & 3, key & 3)
+        parts = [
+            (track_waves[i], gain_table[i][level])
+            for i, level in enumerate(key_levels)
+            if level > 0 and track_waves[i] is not None
+        ]
+        if not parts:
+            continue
+
+        length = max(len(w) for w, _ in parts)
+        if np is not None:
+            row = combo_matrix[key]
+            for w, gain in parts:
+                row[:len(w)] += w * gain
+        else:
+            row = array.array("d", bytes(8 * length))
+            for w, gain in parts:
+                row[:len(w)] = array.array("d", [a + v * gain for a, v in zip(row, w)])
+            combo_matrix[key] = row
+        combo_len[key] = length
+
+    return combo_matrix, combo_len
+
+
+def _select_wave(synth: DrumSynth, wav_attr: str, internal_attr: str):
+    """
+    外部 WAV があれば優先し、無ければ内蔵シンセの波形を返す。
+    numpy がある場合は float32 の ndarray にそろえておく。
+    """
+    wave_data = getattr(synth, wav_attr, None)
+    if wave_data is None:
+        wave_data = getattr(synth, internal_attr, None)
+    if wave_data is not None and np is not None:
+        wave_data = np.asarray(wave_data, dtype=np.float32)
+    return wave_data
+
+
+def _render_score_mix(
     score: Score,
     synth: DrumSynth,
-    filepath: str,
     loop_count: int = 1,
-) -> float:
+) -> Tuple[object, int, float]:
     """
-    Score と DrumSynth からオフラインで WAV を合成して保存する。
+    Score と DrumSynth からオフラインでモノラルのミックスを合成する。
 
     - GUI 再生と同じタイミングで、ステップごとに
       HH / SD / BD の波形をミックスする
     - loop_count 回だけ譜面を連結
-    - return: 書き出した再生時間の目安（秒）
+    - return: (正規化済みミックス[-1.0〜1.0], サンプルレート, 再生時間の目安（秒）)
+      ミックスは numpy があれば float32 の ndarray、無ければ array("d")
     """
     if loop_count <= 0:
         loop_count = 1
@@ -49,19 +174,14 @@ def render_score_to_wav(
     # DrumSynth のサンプルレート
     sr = getattr(synth, "sample_rate", 44100)
 
-    step_duration_sec = 60.0 / (tempo * pulses)
+    step_duration_sec = score.step_duration_sec
     total_steps_all = total_steps_one_loop * loop_count
     total_duration_sec = total_steps_all * step_duration_sec
 
     # 各トラック用の波形（WAV があれば優先、無ければ内蔵シンセ）
-    dyn_gain_map = synth.sound_settings.get(
-        "dyn_gain",
-        {0: 0.0, 1: 0.4, 2: 0.8, 3: 1.1},
-    )
-
-    hh_wave = getattr(synth, "wav_hh", None) or getattr(synth, "internal_hh", None)
-    sd_wave = getattr(synth, "wav_sd", None) or getattr(synth, "internal_sd", None)
-    bd_wave = getattr(synth, "wav_bd", None) or getattr(synth, "internal_bd", None)
+    hh_wave = _select_wave(synth, "wav_hh", "internal_hh")
+    sd_wave = _select_wave(synth, "wav_sd", "internal_sd")
+    bd_wave = _select_wave(synth, "wav_bd", "internal_bd")
 
     available_waves = [w for w in (hh_wave, sd_wave, bd_wave) if w is not None]
     if not available_waves:
@@ -76,67 +196,219 @@ def render_score_to_wav(
         f"duration≈{total_duration_sec:.2f} sec"
     )
 
-    # ミックス用バッファ
-    mix = [0.0] * total_samples
-
-    # ループごとにミックス
-    for loop_idx in range(loop_count):
-        base_step_index = loop_idx * total_steps_one_loop
-        for step in range(total_steps_one_loop):
-            global_step = base_step_index + step
-            start_sample = int(global_step * step_duration_sec * sr)
-
-            # HH, SD, BD の 3 トラックのみ対象
-            for i, track in enumerate(score.tracks[:3]):
-                level = 0
-                for ev in track.events:
-                    if ev.symbol == "rest":
-                        continue
-                    if ev.start_step == step:
-                        level = dynamic_to_level(ev.dynamic)
-                        break
-
-                if level <= 0:
-                    continue
-
-                if i == 0:
-                    base_gain = synth.sound_settings.get("base_gain_hh", 0.4)
-                    wave_data = hh_wave
-                elif i == 1:
-                    base_gain = synth.sound_settings.get("base_gain_sd", 0.3)
-                    wave_data = sd_wave
-                else:
-                    base_gain = synth.sound_settings.get("base_gain_bd", 0.8)
-                    wave_data = bd_wave
-
-                if wave_data is None:
-                    continue
+    # 1 ステップあたりのサンプル数（ステップ毎に掛け算し直さない）
+    samples_per_step = step_duration_sec * sr
 
-                gain = base_gain * dyn_gain_map.get(level, 1.0)
+    # 譜面は毎ループ同じなので、1 ループ分（＋最後の音の余韻）だけ合成しておき、
+    # 後でループ回数分ずらして足し込む
+    loop_len = total_steps_one_loop * samples_per_step
+    period_samples = int(loop_len) + hit_len_max + 2
+    # ステップ → 開始サンプル位置 の表（1 ループ分だけあれば足りる）
+    step_to_sample = [int(step * samples_per_step) for step in range(total_steps_one_loop)]
 
-                for n, v in enumerate(wave_data):
-                    idx = start_sample + n
-                    if idx >= total_samples:
-                        break
-                    mix[idx] += v * gain
+    # ミックス用バッファ（numpy があれば float32 の連続領域）
+    if np is not None:
+        period = np.zeros(period_samples, dtype=np.float32)
+    else:
+        period = array.array("d", bytes(8 * period_samples))
+
+    # ステップ → レベルの表はループ前に 1 度だけ作る
+    levels = _build_step_levels(score, total_steps_one_loop)
+    # 3 トラックのレベル（各 0〜3）を 1 バイトに詰めたステップごとのキー
+    # （HH << 4 | SD << 2 | BD）。0 ならどのトラックも鳴らないので走査しない
+    step_keys = _pack_step_keys(levels)
+    active_steps = [step for step, key in enumerate(step_keys) if key]
+
+    # ゲインは DrumSynth が設定変更時に作っている [トラック][レベル] の表をそのまま使う
+    track_waves = (hh_wave, sd_wave, bd_wave)
+    gain_table = synth.gain_table
+
+    # 実際に使われる (HH, SD, BD) の組み合わせごとに、ゲイン込みで合成済みの波形を作っておき、
+    # ミックス時は 1 ステップ 1 回の加算だけにする
+    combo_matrix, combo_len = _build_combo_table(step_keys, track_waves, gain_table, hit_len_max)
+
+    if _mix_kernel is not None:
+        # numba があればステップ走査ごと JIT カーネルで処理する
+        _mix_kernel(
+            period,
+            combo_matrix,
+            np.array(combo_len, dtype=np.int64),
+            np.frombuffer(step_keys, dtype=np.uint8),
+            np.array(step_to_sample, dtype=np.int64),
+            np.array(active_steps, dtype=np.int64),
+        )
+    else:
+        for step in active_steps:
+            key = step_keys[step]
+            n = combo_len[key]
+            if n <= 0:
+                continue
+
+            # スライス単位でまとめて加算（はみ出し分は切り捨て）
+            start_sample = step_to_sample[step]
+            end = min(start_sample + n, period_samples)
+            if end <= start_sample:
+                continue
+            if np is not None:
+                period[start_sample:end] += combo_matrix[key, :end - start_sample]
+            else:
+                # リストでも添字アクセスの 1 サンプルずつのループを避け、
+                # 区間を丸ごと作り直して代入する
+                period[start_sample:end] = array.array(
+                    "d", [a + b for a, b in zip(period[start_sample:end], combo_matrix[key])]
+                )
+
+    # 1 ループ分をループ回数だけずらして重ねる（前ループの余韻は次ループに重なる）
+    loop_samples = int(loop_len)
+    tail_len = period_samples - loop_samples
+    if loop_count == 1 and period_samples >= total_samples:
+        mix = period[:total_samples]
+    elif (
+        np is not None
+        and loop_samples == loop_len
+        and 0 < tail_len <= loop_samples
+        and loop_samples * loop_count + tail_len <= total_samples
+    ):
+        # 1 ループの長さが整数サンプルで、余韻が次の 1 ループに収まる場合は、
+        # 2 ループ目以降が全部「本体 + 前ループの余韻」と同じ波形になるので、
+        # それを 1 度だけ作って (loop_count - 1, 1 ループ) の形のビューへまとめて書き込む
+        head = period[:loop_samples]
+        tail = period[loop_samples:]
+        steady = head.copy()
+        steady[:tail_len] += tail
+        body_end = loop_samples * loop_count
+        mix = np.zeros(total_samples, dtype=np.float32)
+        mix[:loop_samples] = head
+        mix[loop_samples:body_end].reshape(loop_count - 1, loop_samples)[:] = steady
+        mix[body_end:body_end + tail_len] = tail
+    else:
+        if np is not None:
+            mix = np.zeros(total_samples, dtype=np.float32)
+        else:
+            mix = array.array("d", bytes(8 * total_samples))
+        for loop_idx in range(loop_count):
+            offset = int(loop_idx * loop_len)
+            end = min(offset + period_samples, total_samples)
+            if end <= offset:
+                continue
+            if np is not None:
+                mix[offset:end] += period[:end - offset]
+            else:
+                mix[offset:end] = array.array(
+                    "d", [a + b for a, b in zip(mix[offset:end], period)]
+                )
 
     # 正規化
-    max_amp = max(abs(v) for v in mix) if mix else 0.0
+    if np is not None:
+        max_amp = float(np.abs(mix).max()) if mix.size else 0.0
+    else:
+        max_amp = max(abs(v) for v in mix) if mix else 0.0
     if max_amp > 0:
         if max_amp > 0.99:
             scale = 0.99 / max_amp
-            mix = [v * scale for v in mix]
+            if np is not None:
+                mix *= scale
+            else:
+                mix = array.array("d", [v * scale for v in mix])
     else:
         print("[WARN] WAV export: 無音データになっています。")
 
-    # 16bit PCM で書き出し
-    with wave.open(filepath, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(sr)
-        ints = [max(-32768, min(32767, int(v * 32767))) for v in mix]
-        pcm = struct.pack("<{}h".format(len(ints)), *ints)
-        wf.writeframes(pcm)
+    return mix, sr, total_duration_sec
+
+
+def _pcm16_mono_wav_header(sr: int, data_size: int) -> bytes:
+    """16bit モノラル PCM 用の 44 バイトの RIFF / WAVE ヘッダーを作る。"""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, 1, sr, sr * 2, 2, 16,
+        b"data", data_size,
+    )
+
+
+def _pcm16_scratch(n: int):
+    """
+    int16 変換用の使い回しバッファから長さ n の領域を返す（_pcm_scratch_lock を取った状態で呼ぶこと）。
+    前回以下の長さなら新たな配列確保は行わない。
+    """
+    global _pcm_scratch
+    if _pcm_scratch is None or _pcm_scratch.shape[0] < n:
+        _pcm_scratch = np.empty(n, dtype="<i2")
+    return _pcm_scratch[:n]
+
+
+def _release_pcm16_scratch():
+    """書き出し後に呼ぶ。_PCM_SCRATCH_KEEP を超える大きさのバッファは手放す（_pcm_scratch_lock を取った状態で）。"""
+    global _pcm_scratch
+    if _pcm_scratch is not None and _pcm_scratch.shape[0] > _PCM_SCRATCH_KEEP:
+        _pcm_scratch = None
+
+
+def _write_pcm16_wav(filepath: str, sr: int, pcm) -> None:
+    """
+    16bit モノラル PCM（リトルエンディアン）を WAV として書き出す。
+    pcm はバッファプロトコルを持つもの（bytes / array / ndarray）をそのまま受け取り、
+    バイト列へのコピーを作らずに大きめのバッファ付きファイルへ 1 回で書き出す。
+    一時ファイル（filepath + ".tmp"）に書いてから置き換え、途中で止まっても書きかけの WAV を残さない。
+    """
+    data = memoryview(pcm).cast("B")
+    tmp_path = filepath + ".tmp"
+    try:
+        with open(tmp_path, "wb", buffering=_WAV_WRITE_BUFFER) as raw_file:
+            if _USE_WAVE_MODULE:
+                with wave.open(raw_file, "wb") as wf:
+                    wf.setnchannels(1)
+                    wf.setsampwidth(2)
+                    wf.setframerate(sr)
+                    wf.writeframes(data)
+            else:
+                raw_file.write(_pcm16_mono_wav_header(sr, data.nbytes))
+                raw_file.write(data)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def render_score_to_wav(
+    score: Score,
+    synth: DrumSynth,
+    filepath: str,
+    loop_count: int = 1,
+) -> float:
+    """
+    Score と DrumSynth からオフラインで WAV を合成して保存する。
+
+    - 合成は _render_score_mix() に任せ、ここでは 16bit PCM への変換と書き出しだけ行う
+    - return: 書き出した再生時間の目安（秒）
+    """
+    mix, sr, total_duration_sec = _render_score_mix(score, synth, loop_count)
+
+    # 16bit PCM へ変換
+    if np is not None:
+        # 一時配列を作らずに mix 上でスケール・丸め・クリップし、
+        # リトルエンディアン int16 へ一括変換する
+        mix *= 32767.0
+        np.rint(mix, out=mix)
+        np.clip(mix, -32768, 32767, out=mix)
+        # 使い回しの int16 バッファに変換し、そのバッファを直接ファイルへ書き出す
+        with _pcm_scratch_lock:
+            pcm = _pcm16_scratch(mix.shape[0])
+            try:
+                np.copyto(pcm, mix, casting="unsafe")
+                _write_pcm16_wav(filepath, sr, pcm)
+            finally:
+                _release_pcm16_scratch()
+    else:
+        # struct.pack(*ints) だと全サンプルを引数タプルに展開してしまうので、
+        # 型付き配列に直接詰めてそのまま書き出す（丸めは np.rint と同じ偶数丸め）
+        pcm_arr = array.array("h", [max(-32768, min(32767, round(v * 32767))) for v in mix])
+        if sys.byteorder == "big":
+            pcm_arr.byteswap()
+        _write_pcm16_wav(filepath, sr, pcm_arr)
 
     print(f"[INFO] WAV export: saved to {filepath}")
     return total_duration_sec
@@ -146,19 +418,39 @@ def render_score_to_movie(
     score: Score,
     synth: DrumSynth,
     loop_count: int,
-    capture_frame: Callable[[int], "object"],  # step_index -> PIL.Image.Image 相当
+    capture_frame: Optional[Callable[[int], "object"]],  # step_index -> PIL.Image.Image 相当
     movie_path: str,
     fps: int = 30,
     video_codec: str = "mpeg4",
     audio_codec: str = "aac",
+    capture_thread_safe: bool = False,
+    threads: Optional[int] = None,
+    preset: str = "veryfast",
+    logger: Optional[str] = "bar",
+    audio_via_tempfile: bool = False,
+    capture_frame_arr: Optional[Callable[[int], "object"]] = None,
+    stream_frames: bool = False,
 ) -> None:
     """
-    - render_score_to_wav() で一時 WAV を作成
+    - _render_score_mix() で音声をメモリ上に合成（一時 WAV は作らない）
     - capture_frame(step_index) で譜面キャンバスをフレーム化
     - moviepy で音声と合成して動画を書き出す
+
+    capture_frame_arr を渡すと capture_frame の代わりに呼び、返された ndarray（H×W×3 uint8）を
+    変換せずそのままフレームに使う（capture_frame は None でよい）。
+    capture_thread_safe=True のときは capture_frame 自体もワーカースレッドで並列に呼ぶ
+    （PIL だけで描画する等、Tk に触れない capture_frame 向け）。
+    threads: ffmpeg のエンコードスレッド数（None なら CPU コア数）
+    preset: エンコードのプリセット（速度優先の既定値）。video_codec が libx264 / libx265 の時だけ渡す
+    logger: moviepy の進捗表示（None で無効化）
+    audio_via_tempfile: True なら従来どおり一時 WAV を書き出して AudioFileClip で読み込む
+    （AudioArrayClip がうまく動かない環境向けの逃げ道）
+    stream_frames: True ならフレームを先にまとめてキャプチャせず、エンコード中に必要になった時点で
+    capture を呼ぶ（直前のステップの 1 枚だけ保持）。capture が Tk に触れず、同じ step_index には
+    何度呼んでも同じ画像を返す場合に限る。
     """
     try:
-        from moviepy import ImageSequenceClip, AudioFileClip
+        from moviepy import VideoClip, AudioArrayClip, AudioFileClip
     except ModuleNotFoundError as exc:  # pragma: no cover - 環境依存
         raise RuntimeError("moviepy が必要です。`pip install moviepy` を実行してください。") from exc
 
@@ -167,6 +459,9 @@ def render_score_to_movie(
     except ModuleNotFoundError as exc:  # pragma: no cover - 環境依存
         raise RuntimeError("numpy が必要です。`pip install numpy` を実行してください。") from exc
 
+    if capture_frame is None and capture_frame_arr is None:
+        raise ValueError("capture_frame か capture_frame_arr のどちらかが必要です。")
+
     if loop_count <= 0:
         loop_count = 1
 
@@ -175,7 +470,7 @@ def render_score_to_movie(
     if pulses <= 0 or tempo <= 0:
         raise ValueError("Score のヘッダー情報 (TEMPO, PULSES_PER_BEAT) が不正です。")
 
-    step_duration_sec = 60.0 / (tempo * pulses)
+    step_duration_sec = score.step_duration_sec
     total_steps_one_loop = score.total_steps
     if total_steps_one_loop <= 0:
         raise ValueError("有効なステップ数がありません。")
@@ -183,18 +478,21 @@ def render_score_to_movie(
     total_steps_all = total_steps_one_loop * loop_count
     total_duration_sec = total_steps_all * step_duration_sec
 
-    # 一時 WAV
-    tmp_fd, tmp_wav_path = tempfile.mkstemp(suffix=".wav")
-    os.close(tmp_fd)
+    tmp_wav_path = None
+    if audio_via_tempfile:
+        # 一時 WAV を経由する従来の経路
+        tmp_fd, tmp_wav_path = tempfile.mkstemp(suffix=".wav")
+        os.close(tmp_fd)
+        audio_duration = render_score_to_wav(score, synth, tmp_wav_path, loop_count)
+        audio_clip = AudioFileClip(tmp_wav_path)
+    else:
+        # 音声はメモリ上のミックスをそのまま渡す（一時 WAV の書き出し・再デコードを省く）。
+        # ステレオ化はコピーせず、モノラル配列を 2ch に見せるビューで済ませる
+        mix, sr, audio_duration = _render_score_mix(score, synth, loop_count)
+        mix = np.asarray(mix, dtype=np.float32)
+        audio_clip = AudioArrayClip(np.broadcast_to(mix[:, None], (mix.shape[0], 2)), fps=sr)
 
     try:
-        audio_duration = render_score_to_wav(
-            score=score,
-            synth=synth,
-            filepath=tmp_wav_path,
-            loop_count=loop_count,
-        )
-
         effective_duration = min(total_duration_sec, audio_duration)
         frame_count = max(1, int(effective_duration * fps))
 
@@ -203,37 +501,118 @@ def render_score_to_movie(
             f"fps={fps}, frames={frame_count}"
         )
 
-        frames: List["np.ndarray"] = []
-        for i in range(frame_count):
-            t = i / fps  # sec
-            global_step = int(t / step_duration_sec)
-            if global_step >= total_steps_all:
-                break
-            step_index = global_step % total_steps_one_loop
-
-            img = capture_frame(step_index)
-            frames.append(np.array(img))
-
-        if not frames:
+        # fps がステップ速度より速いと同じ step_index のフレームが続くので、
+        # キャプチャは step_index ごとに 1 回だけ行う。
+        # capture_frame（Tk のスナップショット等）は既定ではメインスレッドのまま呼び、
+        # 画像 → ndarray の変換だけをワーカースレッドに回す。
+        def to_array(img):
+            # RGBA 等は 1 度だけ RGB にそろえ、moviepy 側でフレーム毎に変換させない
+            mode = getattr(img, "mode", None)
+            if mode is not None and mode != "RGB":
+                img = img.convert("RGB")
+            return np.asarray(img)
+
+        def capture_array(step_index: int):
+            if capture_frame_arr is not None:
+                return capture_frame_arr(step_index)
+            return to_array(capture_frame(step_index))
+
+        def frame_global_step(frame_index: int) -> int:
+            return int((frame_index / fps) / step_duration_sec)
+
+        # 音声より後ろのステップにかかるフレームは出さない
+        n_frames = frame_count
+        while n_frames > 0 and frame_global_step(n_frames - 1) >= total_steps_all:
+            n_frames -= 1
+        if n_frames <= 0:
             raise RuntimeError("フレームが1枚も生成されませんでした。")
 
-        video_clip = ImageSequenceClip(frames, fps=fps)
-        audio_clip = AudioFileClip(tmp_wav_path)
+        last_frame = n_frames - 1
+
+        if stream_frames:
+            # 全ステップ分の画像は持たず、ffmpeg へ流すフレームをその場で作る。
+            # 同じステップが続く間は直前の 1 枚を使い回す
+            current = [-1, None]
+
+            def make_frame(t: float):
+                idx = min(int(round(t * fps)), last_frame)
+                step_index = frame_global_step(idx) % total_steps_one_loop
+                if current[0] != step_index:
+                    current[1] = capture_array(step_index)
+                    current[0] = step_index
+                return current[1]
+
+        else:
+            # キャプチャした画像は (ステップ数, H, W, 3) の uint8 配列 1 つにまとめて持つ。
+            # 形は最初のフレームで決まるので、1 枚目だけ同期で取ってから確保し、以降は各スロットへ直接書き込む。
+            frames = None
+            captured = bytearray(total_steps_one_loop)
+            n_captured = 0
+
+            def store_image(step_index: int, img):
+                frames[step_index] = to_array(img)
+
+            def capture_into(step_index: int):
+                frames[step_index] = capture_array(step_index)
+
+            # 必要なステップは先頭から走査すれば出そろうので、全ステップ分
+            # キャプチャできた時点で打ち切る（2 ループ目以降は走査しない）
+            pending: List[Future] = []
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+                for i in range(n_frames):
+                    if n_captured >= total_steps_one_loop:
+                        break
+                    step_index = frame_global_step(i) % total_steps_one_loop
+                    if captured[step_index]:
+                        continue
+                    captured[step_index] = 1
+                    n_captured += 1
+
+                    if frames is None:
+                        first = capture_array(step_index)
+                        frames = np.empty((total_steps_one_loop,) + first.shape, dtype=np.uint8)
+                        frames[step_index] = first
+                    elif capture_thread_safe:
+                        pending.append(pool.submit(capture_into, step_index))
+                    elif capture_frame_arr is not None:
+                        frames[step_index] = capture_frame_arr(step_index)
+                    else:
+                        img = capture_frame(step_index)
+                        pending.append(pool.submit(store_image, step_index, img))
+
+                for future in pending:
+                    future.result()
+
+            print(f"[INFO] Movie: captured {n_captured} unique frames")
+
+            # 全フレーム分の配列は作らず、書き出し時に
+            # フレーム番号 → step_index → キャプチャ済み画像 を引いて返す
+            def make_frame(t: float):
+                idx = min(int(round(t * fps)), last_frame)
+                return frames[frame_global_step(idx) % total_steps_one_loop]
+
+        video_clip = VideoClip(make_frame, duration=n_frames / fps)
         final_clip = video_clip.with_audio(audio_clip)
 
-        final_clip.write_videofile(
-            movie_path,
-            codec=video_codec,
-            audio_codec=audio_codec,
-            fps=fps,
-        )
+        write_kwargs = {
+            "codec": video_codec,
+            "audio_codec": audio_codec,
+            "fps": fps,
+            "threads": threads if threads is not None else os.cpu_count(),
+            "logger": logger,
+        }
+        # preset は x264 / x265 系のエンコーダーのオプションなので、それ以外には渡さない
+        if video_codec in _PRESET_CODECS:
+            write_kwargs["preset"] = preset
+        final_clip.write_videofile(movie_path, **write_kwargs)
 
-        audio_clip.close()
         final_clip.close()
     finally:
-        try:
-            os.remove(tmp_wav_path)
-        except Exception:
-            pass
+        audio_clip.close()
+        if tmp_wav_path is not None:
+            try:
+                os.remove(tmp_wav_path)
+            except Exception:
+                pass
 
     print(f"[INFO] Movie: saved to {movie_path}")
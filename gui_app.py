@@ -1,39 +1,20 @@
 # gui_app.py
 import tkinter as tk
-from tkinter import filedialog, messagebox
-from typing import Optional, Dict, List
+from tkinter import filedialog, messagebox, ttk
+import tkinter.font as tkfont
+from typing import Optional, Dict, List, Set
 import os
-import json
+import queue
+import threading
 
 from score import Score
 from synth import DrumSynth
-from exporter import render_score_to_wav, render_score_to_movie  # WAV & Movie 出力専用モジュール
-from config import APP_VERSION
+from config import APP_VERSION, load_config, save_config
 
 # 描画系 / 再生系の Mixin
 from draw_mixin import ScoreDrawMixin
 from playback_mixin import PlaybackMixin
 
-CONFIG_FILE = os.path.join(os.getcwd(), "drum_app_config.json")
-
-
-def load_config() -> dict:
-    if not os.path.exists(CONFIG_FILE):
-        return {}
-    try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-
-def save_config(config: dict):
-    try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
-    except Exception:
-        pass
-
 
 class DrumApp(ScoreDrawMixin, PlaybackMixin):
         TIME_AREA_WIDTH = 90  # TIME表記＋トラック名＋ミュートエリア
@@ -48,11 +29,14 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             default_data_dir = os.path.join(os.getcwd(), "data")
             self.save_dir = self.config_data.get("save_dir", default_data_dir)
             os.makedirs(self.save_dir, exist_ok=True)
+            # 作成（存在確認）済みのディレクトリ。保存のたびに makedirs の stat を繰り返さない
+            self._ensured_dirs = {self.save_dir}
 
             # ムービー出力ディレクトリ
             default_movie_dir = os.path.join(os.getcwd(), "Mov")
             self.movie_output_dir = self.config_data.get("movie_output_dir", default_movie_dir)
             os.makedirs(self.movie_output_dir, exist_ok=True)
+            self._ensured_dirs.add(self.movie_output_dir)
 
             # ループ収録回数（ムービー出力・WAV出力用）
             self.loop_record_count: int = int(self.config_data.get("loop_record_count", 1))
@@ -66,28 +50,57 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             self.margin_top = 100
             self.margin_bottom = 80  # 下にテンポ表示用のスペース
 
+            # 設定ウインドウ（初回に作って使い回す。open_settings_window）
+            self._settings_win: Optional[tk.Toplevel] = None
+
+            # 起動時の描き直し要求をまとめて 1 回だけ実行するための予約 ID
+            self._redraw_after_id: Optional[str] = None
+            # リサイズ中の連続した <Configure> をまとめるための予約 ID
+            self._resize_after_id: Optional[str] = None
+
+            # 設定の書き込みはまとめて遅延実行する（save_config_debounced）。
+            # config_data の更新は _set_config を通し、値が変わったときだけ _config_dirty を立てる
+            self._config_dirty = False
+            self._config_after_id: Optional[str] = None
+
+            # ファイル読み込みの通し番号（古い読み込み結果で上書きしないため）
+            self._load_seq = 0
+
+            # WAV 書き出し（ワーカースレッド）の実行中フラグ。二重に書き出さないようにする
+            self._export_busy = False
+
+            # ワーカースレッドの結果（メインスレッドで呼ぶ関数と引数）。ワーカーは Tk に触れず
+            # ここに積むだけにし、メインスレッドが root.after で取り出す（_poll_worker_results）
+            self._worker_results: "queue.Queue" = queue.Queue()
+            self._running_workers = 0
+            self._worker_poll_id: Optional[str] = None
+
             # 再生制御
             self.is_playing = False
             self.current_step = 0
             self.highlight_line_id = None
             self.play_after_id: Optional[str] = None
 
-            # ループON/OFF（再生用）→ 設定画面から操作
-            loop_playback = bool(self.config_data.get("loop_playback", False))
-            self.loop_var = tk.BooleanVar(value=loop_playback)
+            # 描画の状態（ScoreDrawMixin が使う）
+            self._dirty_layers: Set[str] = set()
+            self._batch_depth = 0
+            self._grid_key: Optional[tuple] = None
+            self._fonts: Dict[tuple, tkfont.Font] = {}
+            self._step_xs_cache: Optional[tuple] = None
+            self._events_layout: Optional[tuple] = None
+            self._track_signatures: Optional[list] = None
+            # 再生ハイライト（アイドル時にまとめて移動する要求と、矩形の現在の座標・表示状態）
+            self._pending_highlight: Optional[int] = None
+            self._highlight_idle_id: Optional[str] = None
+            self._highlight_coords: Optional[tuple] = None
+            self._highlight_visible = False
+
+            # ループON/OFF（再生用）→ 設定画面から操作（「保存」で反映する）
+            self.loop_playback = bool(self.config_data.get("loop_playback", False))
 
             # Score とサウンド設定
             self.score: Score = Score.create_default_score()
-            self.default_sound_settings = {
-                "base_gain_hh": 0.4,
-                "base_gain_sd": 0.3,
-                "base_gain_bd": 0.8,
-                "dyn_gain": {0: 0.0, 1: 0.4, 2: 0.8, 3: 1.1},
-            }
-
-            self.sound_settings = self._merge_sound_settings(
-                self.config_data.get("sound_settings")
-            )
+            self._load_sound_settings()
 
             # カスタムサンプルのパス
             self.sample_paths: Dict[str, str] = self.config_data.get(
@@ -97,11 +110,8 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
 
             # ドラムシンセ
             self.synth = DrumSynth(sound_settings=self.sound_settings)
-            # （あとで synth.py に update_sample_paths を実装）
-            try:
-                self.synth.update_sample_paths(self.sample_paths)
-            except AttributeError:
-                pass
+            self.synth.update_sample_paths(self.sample_paths)
+            self._start_audio_thread()
 
             # 最後に読み込んだファイルパス
             self.last_filepath: Optional[str] = self.config_data.get("last_file")
@@ -116,7 +126,12 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             # トラック毎ミュート
             self.track_mute_vars: Dict[str, tk.BooleanVar] = {}
             self.track_mute_buttons: List[tk.Checkbutton] = []
+            self.track_mute_window_ids: List[int] = []
+            # ミュート変数に付けた trace と、発音スレッドが読む bool のリスト（PlaybackMixin が使う）
+            self._mute_traces: list = []
+            self._mute_flags: List[bool] = [False, False, False]
             self.rebuild_track_mute_vars()
+            self._rebuild_playback_index()
 
             # geometry 復元
             main_geo = self.config_data.get("main_geometry")
@@ -133,7 +148,24 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
 
             self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
-            self.redraw_all()
+            # 起動直後の <Configure> による描き直しとまとめて、アイドル時に 1 回だけ描く
+            self._request_redraw()
+
+        def _load_sound_settings(self):
+            """config_data のサウンド設定を既定値とマージして self.sound_settings にする。"""
+            self.default_sound_settings = {
+                "base_gain_hh": 0.4,
+                "base_gain_sd": 0.3,
+                "base_gain_bd": 0.8,
+                "dyn_gain": {0: 0.0, 1: 0.4, 2: 0.8, 3: 1.1},
+            }
+
+            self.sound_settings = self._merge_sound_settings(
+                self.config_data.get("sound_settings")
+            )
+            # 読み込んだ dyn_gain はキーが文字列なので、正規化した値で置き換えておく
+            # （そのままだと終了時の _snapshot_config で毎回「変更あり」になってしまう）
+            self.config_data["sound_settings"] = dict(self.sound_settings)
 
         def _merge_sound_settings(self, settings: Optional[dict]) -> dict:
             base = self.default_sound_settings
@@ -175,29 +207,22 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             top_frame = tk.Frame(self.root)
             top_frame.pack(side=tk.TOP, fill=tk.X, pady=5)
 
-            self.play_button = tk.Button(top_frame, text="▶ 再生", command=self.on_play_button)
-            self.play_button.pack(side=tk.LEFT, padx=5)
-
-            load_button = tk.Button(top_frame, text="📂 ファイルから読み込み", command=self.on_load_button)
-            load_button.pack(side=tk.LEFT, padx=5)
-
-            # ※ Loop 再生チェックはここから削除 → 設定画面へ移動
-
-            # WAV 出力ボタン（オフライン合成）
-            wav_button = tk.Button(top_frame, text="🎧 WAV出力", command=self.on_export_wav)
-            wav_button.pack(side=tk.LEFT, padx=5)
-
-            # ムービー出力ボタン（譜面キャンバスのみ録画）
-            export_button = tk.Button(top_frame, text="🎬 出力", command=self.on_export_movie)
-            export_button.pack(side=tk.LEFT, padx=5)
-
-            settings_button = tk.Button(top_frame, text="🖊 設定", command=self.open_settings_window)
-            settings_button.pack(side=tk.LEFT, padx=5)
-
-            self.info_label = tk.Label(
-                top_frame,
-                text="Ready",
+            # ツールバーのボタン: (表示文字列, コマンド, self に持たせる属性名 or None)
+            # ※ Loop 再生チェックは設定画面へ移動
+            buttons = (
+                ("▶ 再生", self.on_play_button, "play_button"),
+                ("📂 ファイルから読み込み", self.on_load_button, None),
+                ("🎧 WAV出力", self.on_export_wav, None),  # オフライン合成
+                ("🎬 出力", self.on_export_movie, None),  # 譜面キャンバスのみ録画
+                ("🖊 設定", self.open_settings_window, None),
             )
+            for text, command, attr in buttons:
+                btn = ttk.Button(top_frame, text=text, command=command)
+                btn.pack(side=tk.LEFT, padx=5)
+                if attr is not None:
+                    setattr(self, attr, btn)
+
+            self.info_label = ttk.Label(top_frame, text="Ready")
             self.info_label.pack(side=tk.LEFT, padx=15)
 
             self.canvas = tk.Canvas(
@@ -209,15 +234,52 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             self.canvas.pack(fill=tk.BOTH, expand=True)
             self.canvas.bind("<Configure>", self.on_canvas_resize)
 
+            # 再生ハイライト（1 つの矩形を移動・表示切替で使い回す）
+            self.highlight_line_id = self.canvas.create_rectangle(
+                0, 0, 0, 0,
+                fill="#ffeeaa",
+                outline="",
+                state="hidden",
+                tags="highlight",
+            )
+
         # ----------------------------
         # キャンバスサイズ変更
         # ----------------------------
         def on_canvas_resize(self, event):
-            if event.width > 100:
-                self.window_width = event.width
-            if event.height > 100:
-                self.window_height = event.height
-            self.redraw_all()
+            width = event.width if event.width > 100 else self.window_width
+            height = event.height if event.height > 100 else self.window_height
+            # 大きさが変わらない <Configure>（移動など）では描き直さない
+            if (width, height) == (self.window_width, self.window_height):
+                return
+            self.window_width = width
+            self.window_height = height
+            # ドラッグ中は <Configure> が連続で届くので、最後の変更から 50ms 空いた時に 1 回だけ描き直す
+            if self._resize_after_id is not None:
+                self.root.after_cancel(self._resize_after_id)
+            self._resize_after_id = self.root.after(50, self._do_resize_redraw)
+
+        def _do_resize_redraw(self):
+            self._resize_after_id = None
+            # 高さだけの変更なら音符は作り直さずトラックごとに移動し、グリッドだけ描き直す
+            if self.shift_tracks_to_height():
+                self.mark_dirty("grid")
+            else:
+                self.mark_dirty(*self._LAYERS)
+            self.redraw_dirty()
+
+        def _request_redraw(self):
+            """
+            全レイヤーの描き直しを予約する。
+            アイドル時に 1 回だけ実行し、それまでに来た要求（起動直後の <Configure> など）はまとめる。
+            """
+            self.mark_dirty(*self._LAYERS)
+            if self._redraw_after_id is None:
+                self._redraw_after_id = self.root.after_idle(self._run_requested_redraw)
+
+        def _run_requested_redraw(self):
+            self._redraw_after_id = None
+            self.redraw_dirty()
 
         # ----------------------------
         # テキスト貼り付けウインドウ
@@ -240,7 +302,7 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             # 上に「読み込み」ボタン
             btn_frame = tk.Frame(win)
             btn_frame.pack(side=tk.TOP, fill=tk.X)
-            load_btn = tk.Button(btn_frame, text="読み込み", command=self.on_text_input_load)
+            load_btn = ttk.Button(btn_frame, text="読み込み", command=self.on_text_input_load)
             load_btn.pack(side=tk.LEFT, padx=5, pady=5)
 
             # テキストエリア
@@ -276,10 +338,7 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             if filename:
                 if not filename.lower().endswith(".txt"):
                     filename += ".txt"
-                try:
-                    os.makedirs(self.save_dir, exist_ok=True)
-                except Exception:
-                    pass
+                self._ensure_dir(self.save_dir)
                 filepath = os.path.join(self.save_dir, filename)
                 try:
                     with open(filepath, "w", encoding="utf-8") as f:
@@ -289,29 +348,27 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
                     messagebox.showerror("保存エラー", f"テキストファイルの保存に失敗しました。\n{e}")
                     filepath = None
 
+            # 解析はワーカースレッドで行い、結果だけメインスレッドに戻す（大きな譜面でも画面を止めない）
+            self.info_label.config(text="解析中...")
+            self._load_seq += 1
+            self._start_worker(self._parse_text_worker, text, filepath, self._load_seq)
+
+        def _parse_text_worker(self, text: str, filepath: Optional[str], seq: int):
             try:
                 score = Score.from_text(text)
             except Exception as e:
-                print("[ERROR] Score Load Failed (Text Input)")
-                print(e)
-                messagebox.showerror("読み込みエラー", f"譜面の読み込みに失敗しました。\n{e}")
+                self._post_result(self._on_text_parse_failed, e, seq)
                 return
+            # テキスト譜ウインドウの内容はそのままなので書き戻さない
+            self._post_result(self._apply_loaded_score, score, filepath, None, seq)
 
-            self.score = score
-            self.rebuild_track_mute_vars()
-            self.stop_playback(silent=True)
-
-            if filepath:
-                filename_only = os.path.basename(filepath)
-                self.last_filepath = filepath
-                self.current_filename = filename_only
-            else:
-                self.current_filename = None
-
-            # ステータスラベルにはファイル名を出さず、シンプルに
-            self.info_label.config(text="読み込み完了")
-
-            self.redraw_all()
+        def _on_text_parse_failed(self, e: Exception, seq: int):
+            if seq != self._load_seq:
+                return
+            print("[ERROR] Score Load Failed (Text Input)")
+            print(e)
+            self.info_label.config(text="")
+            messagebox.showerror("読み込みエラー", f"譜面の読み込みに失敗しました。\n{e}")
 
         # ----------------------------
         # ファイル読み込み
@@ -332,34 +389,96 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
                 return
 
             print(f"[INFO] Loading score from file: {filepath}")
+            self.info_label.config(text="読み込み中...")
+
+            # 読み込みと解析はワーカースレッドで行い、結果だけメインスレッドに戻す
+            self._load_seq += 1
+            self._start_worker(self._parse_score_worker, filepath, self._load_seq)
 
+        def _parse_score_worker(self, filepath: str, seq: int):
+            text: Optional[str] = None
             try:
                 with open(filepath, "r", encoding="utf-8") as f:
                     text = f.read()
-                # テキスト譜ウインドウにも内容を反映
-                if self.text_input_text is not None:
-                    self.text_input_text.delete("1.0", "end")
-                    self.text_input_text.insert("1.0", text)
-
                 score = Score.from_text(text)
             except Exception as e:
-                print("[ERROR] Score Load Failed (File)")
-                print(e)
-                messagebox.showerror("読み込みエラー", f"譜面の読み込みに失敗しました。\n{e}")
+                self._post_result(self._on_score_load_failed, e, text, seq)
                 return
+            self._post_result(self._apply_loaded_score, score, filepath, text, seq)
 
-            self.score = score
-            self.rebuild_track_mute_vars()
-            self.stop_playback(silent=True)
+        def _set_text_input(self, text: Optional[str]):
+            # テキスト譜ウインドウにも内容を反映
+            if text is not None and self.text_input_text is not None:
+                self.text_input_text.delete("1.0", "end")
+                self.text_input_text.insert("1.0", text)
+
+        def _on_score_load_failed(self, e: Exception, text: Optional[str], seq: int):
+            if seq != self._load_seq:
+                return
+            self._set_text_input(text)
+            print("[ERROR] Score Load Failed (File)")
+            print(e)
+            self.info_label.config(text="")
+            messagebox.showerror("読み込みエラー", f"譜面の読み込みに失敗しました。\n{e}")
+
+        def _apply_loaded_score(self, score: Score, filepath: Optional[str], text: Optional[str], seq: int):
+            """
+            解析済みの譜面を反映する（ファイル読み込み・テキスト入力の両方から、メインスレッドで呼ぶ）。
+            filepath が None なら（テキスト入力で FILENAME 指定なし）ファイル名を表示しない。
+            """
+            if seq != self._load_seq:
+                return
+            self._set_text_input(text)
+
+            # 譜面の差し替え中は描き直さず、抜けた時に 1 回だけ描き直す
+            with self.batch_updates():
+                self.score = score
+                self.rebuild_track_mute_vars()
+                self._rebuild_playback_index()
+                self.stop_playback(silent=True)
+
+                if filepath:
+                    self.last_filepath = filepath
+                    self.current_filename = os.path.basename(filepath)
+                else:
+                    self.current_filename = None
 
-            filename_only = os.path.basename(filepath)
-            self.last_filepath = filepath
-            self.current_filename = filename_only
+                # ステータスラベルにはファイル名を出さず、シンプルに
+                self.info_label.config(text="読み込み完了")
 
-            # ここもファイル名は出さずに
-            self.info_label.config(text="読み込み完了")
+                self.mark_dirty(*self._LAYERS)
 
-            self.redraw_all()
+        # ----------------------------
+        # ワーカースレッド
+        # ----------------------------
+        def _start_worker(self, target, *args):
+            """
+            target(*args) をワーカースレッドで実行する。
+            target は Tk に触れず、最後に _post_result() で結果を 1 回だけ返すこと。
+            """
+            self._running_workers += 1
+            threading.Thread(target=target, args=args, daemon=True).start()
+            if self._worker_poll_id is None:
+                self._worker_poll_id = self.root.after(50, self._poll_worker_results)
+
+        def _post_result(self, callback, *args):
+            """ワーカースレッドから呼ぶ。callback(*args) をメインスレッドで実行するよう積んでおく。"""
+            self._worker_results.put((callback, args))
+
+        def _poll_worker_results(self):
+            """ワーカーの結果をメインスレッドで受け取る。動いているワーカーがある間は定期的に呼び直す。"""
+            self._worker_poll_id = None
+            try:
+                while True:
+                    try:
+                        callback, args = self._worker_results.get_nowait()
+                    except queue.Empty:
+                        break
+                    self._running_workers -= 1
+                    callback(*args)
+            finally:
+                if self._running_workers > 0 and self._worker_poll_id is None:
+                    self._worker_poll_id = self.root.after(50, self._poll_worker_results)
 
         # ----------------------------
         # WAV 出力（オフライン合成）
@@ -368,6 +487,9 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             if self.is_playing:
                 messagebox.showinfo("情報", "再生中はWAV出力できません。停止してから実行してください。")
                 return
+            if self._export_busy:
+                messagebox.showinfo("情報", "WAV出力中です。完了してから実行してください。")
+                return
 
             # 保存先ファイル名の初期値
             if self.current_filename:
@@ -391,18 +513,40 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             if not filepath:
                 return
 
+            # 合成と書き出しはワーカースレッドで行い、完了通知だけメインスレッドに戻す
+            self._export_busy = True
+            self.info_label.config(text="WAV出力中…")
+            loop_count = self.loop_record_count if self.loop_record_count > 0 else 1
+            self._start_worker(self._render_wav_worker, self.score, filepath, loop_count)
+
+        def _render_wav_worker(self, score: Score, filepath: str, loop_count: int):
             try:
+                # exporter（numpy / numba を読み込む）は起動を遅くしないよう、初めて書き出す時に読み込む。
+                # ワーカースレッドで import するので、初回の読み込み待ちでも画面は固まらない
+                from exporter import render_score_to_wav
+
                 render_score_to_wav(
-                    score=self.score,
+                    score=score,
                     synth=self.synth,
                     filepath=filepath,
-                    loop_count=self.loop_record_count if self.loop_record_count > 0 else 1,
+                    loop_count=loop_count,
                 )
-                messagebox.showinfo("情報", f"WAVを保存しました。\n{filepath}")
             except Exception as e:
-                print("[ERROR] WAV export failed.")
-                print(e)
-                messagebox.showerror("エラー", f"WAV出力に失敗しました。\n{e}")
+                self._post_result(self._on_wav_export_failed, e)
+                return
+            self._post_result(self._on_wav_export_done, filepath)
+
+        def _on_wav_export_done(self, filepath: str):
+            self._export_busy = False
+            self.info_label.config(text=f"WAV出力完了: {os.path.basename(filepath)}")
+            messagebox.showinfo("情報", f"WAVを保存しました。\n{filepath}")
+
+        def _on_wav_export_failed(self, e: Exception):
+            self._export_busy = False
+            print("[ERROR] WAV export failed.")
+            print(e)
+            self.info_label.config(text="")
+            messagebox.showerror("エラー", f"WAV出力に失敗しました。\n{e}")
 
         # ----------------------------
         # ムービー出力（譜面キャンバスのみ）
@@ -419,6 +563,9 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
             if self.is_playing:
                 messagebox.showinfo("情報", "再生中はムービー出力できません。停止してから実行してください。")
                 return
+            if self._export_busy:
+                messagebox.showinfo("情報", "WAV出力中です。完了してから実行してください。")
+                return
 
             # 依存ライブラリのチェック（Pillow）
             try:
@@ -476,24 +623,51 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
 
             bbox = (x, y, x + w, y + h)
 
-            # capture_frame: step_index -> Image
-            def capture_frame(step_index: int):
-                self.highlight_step(step_index)
-                self.root.update_idletasks()
-                self.root.update()
-                return ImageGrab.grab(bbox=bbox)
+            # 実際に画面を撮るのは「ハイライト無し」と「全ステップをハイライト」の 2 回だけにする。
+            # ハイライトはグリッドより前・音符より後ろにあるので、各ステップのフレームは
+            # 「無し」の画像にそのステップの列だけ「全ハイライト」の画像から貼り付ければ同じ絵になる。
+            # 描画の反映は update_idletasks() だけで足りる（update() だとクリック等のイベントまで処理して再入する）
+            self.clear_highlight()
+            self.root.update_idletasks()
+            plain_img = ImageGrab.grab(bbox=bbox).convert("RGB")
+
+            self.show_highlight_span(0, self.score.total_steps)
+            self.root.update_idletasks()
+            lit_img = ImageGrab.grab(bbox=bbox).convert("RGB")
 
-            # 念のため開始前にハイライトを消す
             self.clear_highlight()
             self.root.update_idletasks()
-            self.root.update()
+
+            # キャンバスの座標はウィジェット左上からのピクセル位置と同じ（スクロールしないため）
+            column_ranges = {}
+            for step_index in range(self.score.total_steps):
+                x_left, x_right = self.highlight_x_range(step_index, step_index + 1)
+                column_ranges[step_index] = (
+                    max(0, int(round(x_left))),
+                    min(w, int(round(x_right))),
+                )
+
+            # capture_frame: step_index -> Image（Tk には触れないのでワーカースレッドから呼んでよい）
+            def capture_frame(step_index: int):
+                left, right = column_ranges[step_index]
+                frame = plain_img.copy()
+                if right > left:
+                    box = (left, 0, right, h)
+                    frame.paste(lit_img.crop(box), box)
+                return frame
 
             try:
+                # exporter / moviepy は初めて書き出す時に読み込む
+                from exporter import render_score_to_movie
+
                 render_score_to_movie(
                     score=self.score,
                     synth=self.synth,
                     loop_count=loop_count,
                     capture_frame=capture_frame,
+                    capture_thread_safe=True,
+                    # 2 枚の画像から都度作れるので、全ステップ分のフレームは溜めずに流す
+                    stream_frames=True,
                     movie_path=movie_path,
                     fps=30,
                     # Windows Media Player で再生しやすい設定（実際は ffmpeg 環境にも依存）
@@ -520,7 +694,6 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
                 # 終了後はハイライトを消す
                 self.clear_highlight()
                 self.root.update_idletasks()
-                self.root.update()
 
             messagebox.showinfo("情報", f"ムービーを書き出しました。\n{movie_path}")
 
@@ -528,42 +701,76 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
         # 設定ウインドウ
         # ----------------------------
         def open_settings_window(self):
+            """
+            設定ウインドウを開く。ウインドウは初回だけ作り、閉じる・保存時は withdraw で隠しておく。
+            2 回目以降は入力欄の値を現在の設定で埋め直して表示するだけにする。
+            """
+            win = self._settings_win
+            if win is not None and win.winfo_exists():
+                self._refresh_settings_vars()
+                win.deiconify()
+                win.lift()
+                return
+
             win = tk.Toplevel(self.root)
             win.title("設定")
-
-            hh_gain = tk.DoubleVar(value=self.sound_settings.get("base_gain_hh", 0.4))
-            sd_gain = tk.DoubleVar(value=self.sound_settings.get("base_gain_sd", 0.3))
-            bd_gain = tk.DoubleVar(value=self.sound_settings.get("base_gain_bd", 0.8))
-
-            dyn_gain_map = self.sound_settings.get("dyn_gain", {})
-            dyn1_gain = tk.DoubleVar(value=dyn_gain_map.get(1, 0.4))
-            dyn2_gain = tk.DoubleVar(value=dyn_gain_map.get(2, 0.8))
-            dyn3_gain = tk.DoubleVar(value=dyn_gain_map.get(3, 1.1))
-            save_dir_var = tk.StringVar(value=self.save_dir)
-            movie_dir_var = tk.StringVar(value=self.movie_output_dir)
-            loop_record_var = tk.IntVar(value=self.loop_record_count)
+            win.protocol("WM_DELETE_WINDOW", win.withdraw)
+            self._settings_win = win
+
+            hh_gain = tk.DoubleVar()
+            sd_gain = tk.DoubleVar()
+            bd_gain = tk.DoubleVar()
+            dyn1_gain = tk.DoubleVar()
+            dyn2_gain = tk.DoubleVar()
+            dyn3_gain = tk.DoubleVar()
+            save_dir_var = tk.StringVar()
+            movie_dir_var = tk.StringVar()
+            loop_record_var = tk.IntVar()
+            loop_playback_var = tk.BooleanVar()
 
             # カスタムサンプルパス用
-            hh_wav_var = tk.StringVar(value=self.sample_paths.get("HH", ""))
-            sd_wav_var = tk.StringVar(value=self.sample_paths.get("SD", ""))
-            bd_wav_var = tk.StringVar(value=self.sample_paths.get("BD", ""))
+            hh_wav_var = tk.StringVar()
+            sd_wav_var = tk.StringVar()
+            bd_wav_var = tk.StringVar()
+
+            def refresh_vars():
+                hh_gain.set(self.sound_settings.get("base_gain_hh", 0.4))
+                sd_gain.set(self.sound_settings.get("base_gain_sd", 0.3))
+                bd_gain.set(self.sound_settings.get("base_gain_bd", 0.8))
+
+                dyn_gain_map = self.sound_settings.get("dyn_gain", {})
+                dyn1_gain.set(dyn_gain_map.get(1, 0.4))
+                dyn2_gain.set(dyn_gain_map.get(2, 0.8))
+                dyn3_gain.set(dyn_gain_map.get(3, 1.1))
+                save_dir_var.set(self.save_dir)
+                movie_dir_var.set(self.movie_output_dir)
+                loop_record_var.set(self.loop_record_count)
+                loop_playback_var.set(self.loop_playback)
+
+                hh_wav_var.set(self.sample_paths.get("HH", ""))
+                sd_wav_var.set(self.sample_paths.get("SD", ""))
+                bd_wav_var.set(self.sample_paths.get("BD", ""))
+
+            refresh_vars()
+            self._refresh_settings_vars = refresh_vars
 
             def add_row(label_text, var, row_idx, kind="str"):
-                lbl = tk.Label(win, text=label_text)
+                lbl = ttk.Label(win, text=label_text)
                 lbl.grid(row=row_idx, column=0, padx=5, pady=5, sticky="e")
-                if kind == "str":
-                    ent = tk.Entry(win, textvariable=var, width=30)
-                else:
-                    ent = tk.Entry(win, textvariable=var, width=10)
+                ent = ttk.Entry(win, textvariable=var, width=30 if kind == "str" else 10)
                 ent.grid(row=row_idx, column=1, padx=5, pady=5, sticky="w")
                 return ent
 
-            add_row("HH ベースゲイン", hh_gain, 0, kind="str")
-            add_row("SD ベースゲイン", sd_gain, 1, kind="str")
-            add_row("BD ベースゲイン", bd_gain, 2, kind="str")
-            add_row("pp/p 音量倍率", dyn1_gain, 3, kind="str")
-            add_row("mp/mf 音量倍率", dyn2_gain, 4, kind="str")
-            add_row("f/ff 音量倍率", dyn3_gain, 5, kind="str")
+            gain_rows = (
+                ("HH ベースゲイン", hh_gain),
+                ("SD ベースゲイン", sd_gain),
+                ("BD ベースゲイン", bd_gain),
+                ("pp/p 音量倍率", dyn1_gain),
+                ("mp/mf 音量倍率", dyn2_gain),
+                ("f/ff 音量倍率", dyn3_gain),
+            )
+            for row_idx, (label_text, var) in enumerate(gain_rows):
+                add_row(label_text, var, row_idx, kind="str")
 
             # 保存ディレクトリ
             ent_dir = add_row("譜面保存ディレクトリ", save_dir_var, 6, kind="str")
@@ -578,7 +785,7 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
                 if path:
                     save_dir_var.set(path)
 
-            btn_browse = tk.Button(win, text="参照...", command=browse_dir)
+            btn_browse = ttk.Button(win, text="参照...", command=browse_dir)
             btn_browse.grid(row=6, column=2, padx=5, pady=5)
 
             # ムービー出力ディレクトリ
@@ -594,24 +801,28 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
                 if path:
                     movie_dir_var.set(path)
 
-            btn_browse_movie = tk.Button(win, text="参照...", command=browse_movie_dir)
+            btn_browse_movie = ttk.Button(win, text="参照...", command=browse_movie_dir)
             btn_browse_movie.grid(row=7, column=2, padx=5, pady=5)
 
             # ループ録画回数
             add_row("Loop録画回数（ムービー出力/WAV出力）", loop_record_var, 8, kind="int")
 
             # 再生時の Loop チェック（ここへ移動）
-            loop_chk = tk.Checkbutton(
+            loop_chk = ttk.Checkbutton(
                 win,
                 text="Loop再生（終端で先頭に戻る）",
-                variable=self.loop_var,
+                variable=loop_playback_var,
             )
             loop_chk.grid(row=9, column=1, padx=5, pady=5, sticky="w")
 
             # 各トラックの WAV ファイル指定
-            ent_hh_wav = add_row("HH WAVファイル", hh_wav_var, 10, kind="str")
-            ent_sd_wav = add_row("SD WAVファイル", sd_wav_var, 11, kind="str")
-            ent_bd_wav = add_row("BD WAVファイル", bd_wav_var, 12, kind="str")
+            wav_rows = (
+                ("HH WAVファイル", hh_wav_var),
+                ("SD WAVファイル", sd_wav_var),
+                ("BD WAVファイル", bd_wav_var),
+            )
+            for row_idx, (label_text, var) in enumerate(wav_rows, start=10):
+                add_row(label_text, var, row_idx, kind="str")
 
             def browse_wav(var: tk.StringVar):
                 cur = var.get() or os.getcwd()
@@ -624,14 +835,9 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
                 if path:
                     var.set(path)
 
-            btn_browse_hh = tk.Button(win, text="参照...", command=lambda: browse_wav(hh_wav_var))
-            btn_browse_hh.grid(row=10, column=2, padx=5, pady=5)
-
-            btn_browse_sd = tk.Button(win, text="参照...", command=lambda: browse_wav(sd_wav_var))
-            btn_browse_sd.grid(row=11, column=2, padx=5, pady=5)
-
-            btn_browse_bd = tk.Button(win, text="参照...", command=lambda: browse_wav(bd_wav_var))
-            btn_browse_bd.grid(row=12, column=2, padx=5, pady=5)
+            for row_idx, (_label_text, var) in enumerate(wav_rows, start=10):
+                btn_browse_wav = ttk.Button(win, text="参照...", command=lambda v=var: browse_wav(v))
+                btn_browse_wav.grid(row=row_idx, column=2, padx=5, pady=5)
 
             def on_save():
                 try:
@@ -645,33 +851,34 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
                     messagebox.showerror("エラー", "ゲインには数値を入力してください。")
                     return
 
-                self.sound_settings["base_gain_hh"] = new_hh
-                self.sound_settings["base_gain_sd"] = new_sd
-                self.sound_settings["base_gain_bd"] = new_bd
-                self.sound_settings["dyn_gain"] = {
-                    0: 0.0,
-                    1: new_dyn1,
-                    2: new_dyn2,
-                    3: new_dyn3,
+                new_gains = {
+                    "base_gain_hh": new_hh,
+                    "base_gain_sd": new_sd,
+                    "base_gain_bd": new_bd,
+                    "dyn_gain": {
+                        0: 0.0,
+                        1: new_dyn1,
+                        2: new_dyn2,
+                        3: new_dyn3,
+                    },
+                }
+                # シンセ側の現在値と違うものだけを後で反映する
+                changed_gains = {
+                    k: v for k, v in new_gains.items() if self.synth.sound_settings.get(k) != v
                 }
+                self.sound_settings.update(new_gains)
 
                 new_dir = save_dir_var.get().strip()
                 if not new_dir:
                     new_dir = os.path.join(os.getcwd(), "data")
                 self.save_dir = new_dir
-                try:
-                    os.makedirs(self.save_dir, exist_ok=True)
-                except Exception:
-                    pass
+                self._ensure_dir(self.save_dir)
 
                 new_movie_dir = movie_dir_var.get().strip()
                 if not new_movie_dir:
                     new_movie_dir = os.path.join(os.getcwd(), "Mov")
                 self.movie_output_dir = new_movie_dir
-                try:
-                    os.makedirs(self.movie_output_dir, exist_ok=True)
-                except Exception:
-                    pass
+                self._ensure_dir(self.movie_output_dir)
 
                 try:
                     lr = int(loop_record_var.get())
@@ -680,6 +887,7 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
                 except ValueError:
                     lr = 1
                 self.loop_record_count = lr
+                self.loop_playback = bool(loop_playback_var.get())
 
                 # カスタムサンプルパスを保存
                 self.sample_paths = {
@@ -688,46 +896,97 @@ class DrumApp(ScoreDrawMixin, PlaybackMixin):
                     "BD": bd_wav_var.get().strip(),
                 }
 
-                self.config_data["sound_settings"] = self.sound_settings
-                self.config_data["save_dir"] = self.save_dir
-                self.config_data["movie_output_dir"] = self.movie_output_dir
-                self.config_data["loop_record_count"] = self.loop_record_count
-                self.config_data["loop_playback"] = bool(self.loop_var.get())
-                self.config_data["sample_paths"] = self.sample_paths
-                save_config(self.config_data)
+                self._snapshot_config()
+                self.save_config_debounced()
 
-                # サウンド設定を反映
-                self.synth.update_params(self.sound_settings)
+                # サウンド設定を反映（ゲインが変わっていなければ何もしない）
+                if changed_gains:
+                    self.synth.update_params(changed_gains)
 
-                # カスタムサンプルも反映（synth.py に実装が必要）
-                try:
-                    self.synth.update_sample_paths(self.sample_paths)
-                except AttributeError:
-                    pass
+                # カスタムサンプルも反映（変更のない WAV はキャッシュから）
+                self.synth.update_sample_paths(self.sample_paths)
 
                 messagebox.showinfo("情報", "設定を保存しました。")
+                win.withdraw()
 
-            save_btn = tk.Button(win, text="保存", command=on_save)
+            save_btn = ttk.Button(win, text="保存", command=on_save)
             save_btn.grid(row=14, column=0, columnspan=3, pady=10)
 
+        # ----------------------------
+        # 設定の保存
+        # ----------------------------
+        def _ensure_dir(self, path: str):
+            """ディレクトリを作成する（作成済みと分かっているものは何もしない。失敗しても例外は出さない）。"""
+            if path in self._ensured_dirs:
+                return
+            try:
+                os.makedirs(path, exist_ok=True)
+            except OSError:
+                return
+            self._ensured_dirs.add(path)
+
+        def _set_config(self, key: str, value) -> None:
+            """config_data の 1 項目を更新する。値が変わったときだけ未保存フラグを立てる。"""
+            if key not in self.config_data or self.config_data[key] != value:
+                self.config_data[key] = value
+                self._config_dirty = True
+
+        def _snapshot_config(self):
+            """
+            設定画面・終了時の両方で保存する項目を config_data に写す。
+            dict はその場で書き換えられるので、写すときはコピーにして次回の比較に使えるようにする。
+            """
+            self._set_config("sound_settings", dict(self.sound_settings))
+            self._set_config("save_dir", self.save_dir)
+            self._set_config("movie_output_dir", self.movie_output_dir)
+            self._set_config("loop_record_count", self.loop_record_count)
+            self._set_config("loop_playback", self.loop_playback)
+            self._set_config("sample_paths", dict(self.sample_paths))
+
+        def save_config_debounced(self):
+            """
+            未保存の変更があれば、書き込みを 500ms 後にまとめて行う。
+            続けて呼ばれても書き込みは 1 回だけ（終了時は on_close で即時保存する）。
+            """
+            if not self._config_dirty:
+                return
+            if self._config_after_id is None:
+                self._config_after_id = self.root.after(500, self._flush_config_if_dirty)
+
+        def _flush_config_if_dirty(self):
+            self._config_after_id = None
+            if not self._config_dirty:
+                return
+            self._config_dirty = False
+            save_config(self.config_data)
+
         # ----------------------------
         # 終了処理
         # ----------------------------
         def on_close(self):
+            # 書き出しの途中で終了すると、ワーカースレッドごと止まってしまう
+            if self._export_busy:
+                messagebox.showinfo("情報", "WAV出力中です。完了してから終了してください。")
+                return
+            if self._worker_poll_id is not None:
+                self.root.after_cancel(self._worker_poll_id)
+                self._worker_poll_id = None
+            if self._config_after_id is not None:
+                self.root.after_cancel(self._config_after_id)
+                self._config_after_id = None
             try:
-                self.config_data["main_geometry"] = self.root.winfo_geometry()
+                self._set_config("main_geometry", self.root.winfo_geometry())
                 if self.text_input_window is not None:
-                    self.config_data["text_geometry"] = self.text_input_window.winfo_geometry()
+                    self._set_config("text_geometry", self.text_input_window.winfo_geometry())
                 if self.last_filepath:
-                    self.config_data["last_file"] = self.last_filepath
-                self.config_data["sound_settings"] = self.sound_settings
-                self.config_data["save_dir"] = self.save_dir
-                self.config_data["movie_output_dir"] = self.movie_output_dir
-                self.config_data["loop_record_count"] = self.loop_record_count
-                self.config_data["loop_playback"] = bool(self.loop_var.get())
-                self.config_data["sample_paths"] = self.sample_paths
-                save_config(self.config_data)
+                    self._set_config("last_file", self.last_filepath)
+                self._snapshot_config()
+                # 起動時から何も変わっていなければ書き込まない
+                if self._config_dirty:
+                    self._config_dirty = False
+                    save_config(self.config_data)
             except Exception:
                 pass
+            self._stop_audio_thread()
             print("[INFO] Application closed.")
             self.root.destroy()
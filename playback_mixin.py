@@ -1,5 +1,18 @@
 # playback_mixin.py
-import winsound
+import queue
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from score import _DYN_LEVEL
+
+try:
+    import winsound
+except ModuleNotFoundError:  # pragma: no cover - 環境依存（Windows 以外）
+    winsound = None
+
+# 発音キューに積む「鳴っている音を止める」指示（再生開始・停止時）
+_AUDIO_FLUSH = ()
 
 
 class PlaybackMixin:
@@ -9,26 +22,167 @@ class PlaybackMixin:
       - self.root
       - self.score
       - self.synth
-      - self.loop_var (tk.BooleanVar)
+      - self.loop_playback (bool)
       - self.is_playing
       - self.current_step
       - self.play_after_id
       - self.play_button
       - self.track_mute_vars
+      - self._mute_traces (list), self._mute_flags (list[bool])（DrumApp.__init__ で初期化しておく）
       - highlight_step / clear_highlight (ScoreDrawMixin 側で提供)
+
+    譜面を差し替えたら _rebuild_playback_index() を呼び、ステップ → 発音の索引を作り直すこと。
+    発音は専用スレッドで行う。起動時に _start_audio_thread()、終了時に _stop_audio_thread() を呼ぶこと。
+    再生開始時に 1 ループ分の発音表（タイムライン）を発音スレッドに渡し、発音の時刻は発音スレッドが決める。
+    Tk の after はハイライトの移動と再生終了の判定だけに使う。
     """
 
     # ----------------------------
-    # 強弱記号 → レベル変換
+    # 発音スレッド
+    # ----------------------------
+    def _start_audio_thread(self):
+        """
+        synth.play_combo を Tk のメインループから切り離すための発音スレッドを起動する。
+        再生開始時に (世代, タイムライン, ステップ数, 開始時刻, ステップ間隔) をキューに積むと、
+        発音スレッドがタイムラインを先頭から順に、各ステップの絶対時刻に合わせて鳴らす。
+        """
+        self._audio_q: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._audio_gen = 0
+        self._audio_thread = threading.Thread(target=self._audio_loop, daemon=True)
+        self._audio_thread.start()
+
+    def _stop_audio_thread(self):
+        self._audio_gen += 1
+        self._audio_q.put(None)
+
+    def _flush_audio(self, silence: bool = True):
+        """
+        キューに残っている発音を捨てる（世代を進める）。
+        silence=True なら鳴っている音も止める（PlaySound(None) は発音スレッド側で呼ぶ）。
+        """
+        self._audio_gen += 1
+        if silence:
+            self._audio_q.put(_AUDIO_FLUSH)
+
+    def _audio_loop(self):
+        q = self._audio_q
+        while True:
+            item = q.get()
+            if item is None:
+                break
+            if not item:
+                if winsound is not None:
+                    winsound.PlaySound(None, 0)
+                continue
+
+            gen, timeline, n_steps, start, interval = item
+            self._play_timeline(gen, timeline, n_steps, start, interval)
+
+    def _wait_until(self, gen: int, target: float) -> bool:
+        """発音時刻まで待つ。途中で停止された（世代が変わった）ら False。"""
+        perf_counter = time.perf_counter
+        while gen == self._audio_gen:
+            delay = target - perf_counter()
+            if delay <= 0:
+                return True
+            # 停止・再開にすぐ応じられるよう、長く眠りすぎない
+            time.sleep(min(delay, 0.02))
+        return False
+
+    def _play_timeline(self, gen: int, timeline: List, n_steps: int, start: float, interval: float):
+        """
+        発音スレッド側の再生ループ。timeline は鳴らすステップだけの [(step, (HH, SD, BD)), ...]。
+        音の無いステップでは起きずに、次に鳴らすステップの時刻まで眠る。
+        ミュートは鳴らす直前に mute_flags を見て反映し、ループの有無は各ループの頭で loop_playback を見る。
+        """
+        if n_steps <= 0:
+            return
+        mute_flags = self._mute_flags
+        play_combo = self.synth.play_combo
+        loop_index = 0
+        while True:
+            loop_start = start + loop_index * n_steps * interval
+            if loop_index > 0:
+                # 2 ループ目以降は、ループの境目の時点でループ再生が有効な場合だけ続ける
+                if not self._wait_until(gen, loop_start) or not self.loop_playback:
+                    return
+
+            for step, (hh, sd, bd) in timeline:
+                if not self._wait_until(gen, loop_start + step * interval):
+                    return
+                if mute_flags[0]:
+                    hh = 0
+                if mute_flags[1]:
+                    sd = 0
+                if mute_flags[2]:
+                    bd = 0
+                if not (hh or sd or bd):
+                    continue
+                try:
+                    play_combo(hh, sd, bd)
+                except Exception as e:
+                    print(f"[WARN] play_combo failed: {e}")
+            loop_index += 1
+
+    # ----------------------------
+    # ステップ → 発音 の索引
     # ----------------------------
-    def dynamic_to_level(self, dyn: str) -> int:
-        if dyn in ("pp", "p"):
-            return 1
-        if dyn in ("mp", "mf"):
-            return 2
-        if dyn in ("f", "ff"):
-            return 3
-        return 2
+    def _rebuild_playback_index(self):
+        """
+        HH / SD / BD の 3 トラックについて、start_step → [(トラック番号, レベル), ...] の索引を作る。
+        play_step で毎ステップ全イベントを線形探索しないようにするため。
+        同じステップに複数のイベントがある場合は、トラックごとに先頭のものだけを採用する。
+        """
+        step_index: Dict[int, List[Tuple[int, int]]] = {}
+        dyn_level = _DYN_LEVEL.get
+        for i, track in enumerate(self.score.tracks[:3]):
+            for step, ev in track.onsets().items():
+                step_index.setdefault(step, []).append((i, dyn_level(ev.dynamic, 2)))
+        self._step_index = step_index
+        self._build_timeline()
+
+    def _build_timeline(self):
+        """
+        譜面とミュート用の変数が決まった時点で、1 ループ分の発音表（タイムライン）を作る。
+        タイムラインは音のあるステップだけの [(step, (HH, SD, BD)), ...]（step の昇順）。
+        休符だけのステップは載せないので、発音スレッドはそこで起きずに済む。
+        ミュートはここでは反映せず、発音スレッドが鳴らす直前に mute_flags を見る。
+        ミュート変数を作り直したら（rebuild_track_mute_vars の後）呼び直すこと。
+        """
+        step_index = self._step_index
+
+        # ミュート状態は BooleanVar の trace で bool のリストに写しておき、
+        # 発音スレッドから Tk の変数を読まずに済ませる
+        for var, trace_id in self._mute_traces:
+            try:
+                var.trace_remove("write", trace_id)
+            except Exception:
+                pass
+        mute_flags = [False, False, False]
+        mute_traces = []
+        for i, track in enumerate(self.score.tracks[:3]):
+            var = self.track_mute_vars.get(track.name)
+            if var is None:
+                continue
+            mute_flags[i] = bool(var.get())
+
+            def on_write(*_args, i=i, var=var):
+                mute_flags[i] = bool(var.get())
+
+            mute_traces.append((var, var.trace_add("write", on_write)))
+        self._mute_traces = mute_traces
+        self._mute_flags = mute_flags
+
+        total_steps = self.score.total_steps
+        timeline: List[Tuple[int, Tuple[int, int, int]]] = []
+        for step in sorted(step_index):
+            if not 0 <= step < total_steps:
+                continue
+            levels = [0, 0, 0]  # HH, SD, BD
+            for i, level in step_index[step]:
+                levels[i] = level
+            timeline.append((step, tuple(levels)))
+        self._timeline = timeline
 
     # ----------------------------
     # 再生関連
@@ -47,16 +201,41 @@ class PlaybackMixin:
                 pass
             self.play_after_id = None
 
+        step_interval_s = self.score.step_duration_sec
+        if step_interval_s <= 0:
+            print("[WARN] TEMPO / PULSES_PER_BEAT が不正なため再生できません。")
+            return
+
         self.is_playing = True
         self.current_step = 0
+        self._sync_mute_flags()
+
+        # 各ステップの発音時刻は再生開始時刻からの絶対時間で決める（after の誤差を積み上げない）
+        self._step_interval_s = step_interval_s
+        self._play_tick = 0
+        self._play_start = time.perf_counter()
         self.play_button.config(text="■ 停止")
         print("[INFO] Start playback.")
         self.clear_highlight()
-        winsound.PlaySound(None, 0)
+        # 再生開始時は前回のタイムラインを打ち切るだけでよい（先頭の音を PlaySound(None) で待たせない）
+        self._flush_audio(silence=False)
+        self._audio_q.put(
+            (self._audio_gen, self._timeline, self.score.total_steps, self._play_start, step_interval_s)
+        )
 
         self.play_step()
         self.schedule_next_step()
 
+    def _sync_mute_flags(self):
+        """
+        再生開始時にミュートの bool リストをチェックボックスの現在値にそろえる。
+        再生中の切り替えは trace で反映されるので、Tk の変数を読むのはここの 1 回だけ。
+        """
+        mute_flags = self._mute_flags
+        for i, track in enumerate(self.score.tracks[:3]):
+            var = self.track_mute_vars.get(track.name)
+            mute_flags[i] = bool(var.get()) if var is not None else False
+
     def stop_playback(self, silent: bool = False):
         if self.play_after_id is not None:
             try:
@@ -68,23 +247,26 @@ class PlaybackMixin:
         self.is_playing = False
         self.play_button.config(text="▶ 再生")
         self.clear_highlight()
-        winsound.PlaySound(None, 0)
+        self._flush_audio()
         if not silent:
             print("[INFO] Stop playback.")
 
     def schedule_next_step(self):
         if not self.is_playing:
             return
-        step_ms = int(60_000 / (self.score.tempo * self.score.pulses_per_beat))
-        self.play_after_id = self.root.after(step_ms, self.advance_step)
+        # 次のステップの目標時刻までの残り時間だけ待つ（遅れていれば即時）
+        target = self._play_start + (self._play_tick + 1) * self._step_interval_s
+        delay_ms = max(0, int(round((target - time.perf_counter()) * 1000)))
+        self.play_after_id = self.root.after(delay_ms, self.advance_step)
 
     def advance_step(self):
         if not self.is_playing:
             return
 
+        self._play_tick += 1
         self.current_step += 1
         if self.current_step >= self.score.total_steps:
-            if self.loop_var.get():
+            if self.loop_playback:
                 self.current_step = 0
             else:
                 print("[INFO] Playback finished.")
@@ -95,37 +277,5 @@ class PlaybackMixin:
         self.schedule_next_step()
 
     def play_step(self):
-        step = self.current_step
-        self.highlight_step(step)
-
-        hh_level = 0
-        sd_level = 0
-        bd_level = 0
-
-        for i, track in enumerate(self.score.tracks):
-            if i >= 3:
-                break
-
-            level = 0
-            for ev in track.events:
-                if ev.symbol == "rest":
-                    continue
-                if ev.start_step == step:
-                    level = self.dynamic_to_level(ev.dynamic)
-                    break
-
-            mute_var = self.track_mute_vars.get(track.name)
-            if mute_var is not None and mute_var.get():
-                level = 0
-
-            if i == 0:
-                hh_level = level
-            elif i == 1:
-                sd_level = level
-            elif i == 2:
-                bd_level = level
-
-        if hh_level == 0 and sd_level == 0 and bd_level == 0:
-            return
-
-        self.synth.play_combo(hh_level, sd_level, bd_level)
+        # 発音は発音スレッドがタイムラインに沿って行うので、ここではハイライトだけ動かす
+        self.highlight_step(self.current_step)
@@ -1,6 +1,6 @@
 import re
-from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Optional
 
 
 # ==========================================================
@@ -8,8 +8,41 @@ from typing import List, Tuple, Optional
 # テキスト譜面ルール ＋ CHECK ブロック検証
 # ==========================================================
 
+# 音価トークン（先頭の記号 + 音価の数字）。from_text のたびにコンパイルしないようモジュールで 1 度だけ作る
+_DURATION_RE = re.compile(r"^(?P<prefix>[xXoO\-rR_]?)?(?P<note_value>64|32|16|8|4|2|1)$")
 
-@dataclass
+# 行末コメント（'#' から行末まで）。行の区切りは str.splitlines と同じ文字で判定する
+_COMMENT_RE = re.compile("#[^\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]*")
+
+# ヘッダー行のキー（"KEY=値" の形。トラック行・CHECK ブロックより先に判定する）
+_HEADER_KEYS = frozenset(("FILENAME", "TITLE", "TEMPO", "TIME", "PULSES_PER_BEAT"))
+
+# 音価の文字列 → 数値（_TOKEN_RE / _DURATION_RE が受け付けるものだけなので int() を通さず表で引く）
+_NOTE_VALUES = {str(v): v for v in (1, 2, 4, 8, 16, 32, 64)}
+
+# 1 文字の記号 → NoteEvent.symbol（休符の記号はまとめて "rest"）。表に無い文字は未知のトークン
+_SYMBOL_TABLE = {
+    "x": "x", "X": "X", "o": "o", "O": "O",
+    "-": "rest", "r": "rest", "R": "rest", "_": "rest", ".": "rest",
+}
+
+# 強弱記号 → 発音レベル（1〜3。表に無いものは 2 扱い）。再生（playback_mixin）と書き出し（exporter）で共有する
+_DYN_LEVEL = {"pp": 1, "p": 1, "mp": 2, "mf": 2, "f": 3, "ff": 3}
+
+# 使える強弱記号
+_DYNAMICS = frozenset(_DYN_LEVEL)
+
+# 正しいトークン全体（音価 or 1 ステップ記号、強弱、末尾の '+'）を 1 回の match で切り出す。
+# 合わないトークンは parse_token の従来の手順に回して、個別のエラーメッセージを出す
+_TOKEN_RE = re.compile(
+    r"(?:(?P<prefix>[xXoO\-rR_]?)(?P<note_value>64|32|16|8|4|2|1)|(?P<single>[xXoO\-rR_.]))"
+    r"(?:\^(?P<dyn>pp|p|mp|mf|f|ff))?"
+    r"(?P<plus>\+*)"
+)
+
+
+# イベント・トラックは数が多いので __slots__ にしてインスタンスを小さくする
+@dataclass(slots=True)
 class NoteEvent:
     start_step: int
     length_steps: int
@@ -17,10 +50,27 @@ class NoteEvent:
     dynamic: str = "mf"
 
 
-@dataclass
+@dataclass(slots=True)
 class Track:
     name: str
     events: List[NoteEvent]
+    # onsets() の結果（初回呼び出し時に作る）
+    _onsets: Optional[Dict[int, NoteEvent]] = field(default=None, init=False, repr=False, compare=False)
+
+    def onsets(self) -> Dict[int, NoteEvent]:
+        """
+        start_step → そのステップで始まる（休符でない）イベント。
+        同じステップに複数ある場合は先頭のものを採用する。
+        再生・書き出しのたびにイベントを走査しないよう、初回に 1 度だけ作って使い回す
+        （イベントは読み込み後に書き換えない前提）。
+        """
+        if self._onsets is None:
+            onsets: Dict[int, NoteEvent] = {}
+            for ev in self.events:
+                if ev.symbol != "rest" and ev.start_step not in onsets:
+                    onsets[ev.start_step] = ev
+            self._onsets = onsets
+        return self._onsets
 
 
 @dataclass
@@ -72,6 +122,17 @@ class Score:
         """
         return self.bars * self.bar_steps
 
+    @property
+    def step_duration_sec(self) -> float:
+        """
+        1 ステップの長さ（秒）。再生・WAV / ムービー書き出しで共通に使う。
+        TEMPO か PULSES_PER_BEAT が 0 以下なら 0.0。
+        """
+        denom = self.tempo * self.pulses_per_beat
+        if denom <= 0:
+            return 0.0
+        return 60.0 / denom
+
     # ================================
     # テキスト → Score パース
     # ================================
@@ -122,7 +183,12 @@ class Score:
         tracks: List[Track] = []
         title: Optional[str] = None
 
-        lines = text.splitlines()
+        # TIME / PULSES_PER_BEAT から決まる値は、ヘッダーが変わった時だけ計算し直す
+        bar_steps: Optional[int] = None
+        note_steps: Dict[int, int] = {}  # 音価 → ステップ数（note_value_to_steps の結果）
+
+        # 行末コメントは全体に 1 回の置換でまとめて消しておき、行ごとに split しない
+        lines = _COMMENT_RE.sub("", text).splitlines()
 
         # 行ごとのトラック情報を保持
         track_events_map: dict[str, List[NoteEvent]] = {}
@@ -140,7 +206,7 @@ class Score:
                 base, dyn = token_raw.split("^", 1)
                 base = base.strip()
                 dyn = dyn.strip()
-                if dyn not in ("pp", "p", "mp", "mf", "f", "ff"):
+                if dyn not in _DYNAMICS:
                     raise ValueError(f"未知の強弱記号 '{dyn}' in '{token_raw}'")
                 if base == ".":
                     raise ValueError("'.' に強弱は付けられません。")
@@ -150,10 +216,12 @@ class Score:
 
             return base, dyn
 
-        duration_pattern = re.compile(r"^(?P<prefix>[xXoO\-rR_]?)?(?P<note_value>64|32|16|8|4|2|1)$")
-
         def note_value_to_steps(note_value: int) -> int:
-            """拍子記号と PPB から音価をステップ数へ換算する。"""
+            """拍子記号と PPB から音価をステップ数へ換算する（換算できたものは note_steps に覚えておく）。"""
+
+            steps = note_steps.get(note_value)
+            if steps is not None:
+                return steps
 
             numerator = pulses_per_beat * time_sig[1]
             if note_value <= 0:
@@ -165,9 +233,38 @@ class Score:
                     f"音価 1/{note_value} を整数ステップに変換できません。PPB を見直してください。"
                 )
 
-            return numerator // note_value
+            steps = numerator // note_value
+            note_steps[note_value] = steps
+            return steps
 
         def parse_token(token_raw: str) -> Tuple[str, str, int]:
+            """
+            トークンを (symbol, dyn, length_steps) にする。
+            形の正しいトークンは _TOKEN_RE の 1 回の match で各部分を取り出し、
+            合わないもの（'.' に強弱を付けた等を含む）は parse_token_checked でエラー内容を調べる。
+            """
+            m = _TOKEN_RE.fullmatch(token_raw)
+            if m is None:
+                return parse_token_checked(token_raw)
+
+            single = m.group("single")
+            dyn = m.group("dyn")
+            if single == "." and dyn:
+                return parse_token_checked(token_raw)
+            plus_count = len(m.group("plus"))
+
+            if single is not None:
+                return _SYMBOL_TABLE[single], dyn or "mf", 1 + plus_count
+
+            note_value = _NOTE_VALUES[m.group("note_value")]
+            length_steps = note_value_to_steps(note_value)
+            if plus_count not in (0, length_steps - 1):
+                return parse_token_checked(token_raw)
+
+            # 音色を省略した場合は標準の "x" を鳴らす（prefix は '.' 以外の記号か空文字）
+            return _SYMBOL_TABLE.get(m.group("prefix"), "x"), dyn or "mf", length_steps
+
+        def parse_token_checked(token_raw: str) -> Tuple[str, str, int]:
             """
             拍指定を含む新フォーマットを解釈し、
             (symbol, dyn, length_steps) を返す。
@@ -197,10 +294,10 @@ class Score:
             if base == "." and dyn != "mf":
                 raise ValueError("'.' に強弱は付けられません。")
 
-            m = duration_pattern.match(base)
+            m = _DURATION_RE.match(base)
 
             if m:
-                note_value = int(m.group("note_value"))
+                note_value = _NOTE_VALUES[m.group("note_value")]
                 prefix = m.group("prefix") or ""
 
                 length_steps = note_value_to_steps(note_value)
@@ -211,19 +308,12 @@ class Score:
                         f"（期待 {length_steps - 1} 個）"
                     )
 
-                if prefix in {"-", "r", "R", "_"}:
-                    symbol = "rest"
-                elif prefix in {"x", "X", "o", "O"}:
-                    symbol = prefix
-                else:
-                    # 音色を省略した場合は標準の "x" を鳴らす
-                    symbol = "x"
+                # 音色を省略した場合は標準の "x" を鳴らす
+                symbol = _SYMBOL_TABLE.get(prefix, "x")
             else:
-                allowed = {"x", "X", "o", "O", "-", "r", "R", "_", "."}
-                if base not in allowed:
+                symbol = _SYMBOL_TABLE.get(base)
+                if symbol is None:
                     raise ValueError(f"未知のトークン '{token_raw}'")
-
-                symbol = "rest" if base in {"-", "r", "R", "_", "."} else base
                 length_steps = 1 + plus_count
 
             return symbol, dyn, length_steps
@@ -232,9 +322,7 @@ class Score:
         # 行解析
         # ================================
         for raw in lines:
-            # 行末コメント除去
-            raw_no_comment = raw.split("#", 1)[0]
-            line = raw_no_comment.strip()
+            line = raw.strip()
             if not line:
                 continue
 
@@ -264,23 +352,23 @@ class Score:
                 check_values[key] = int(value_str)
                 continue
 
-            # ヘッダー
-            if line.startswith("FILENAME="):
-                # Score 側では使わない
-                continue
-            if line.startswith("TITLE="):
-                title = line.split("=", 1)[1].strip()
-                continue
-            if line.startswith("TEMPO="):
-                tempo = int(line.split("=", 1)[1])
-                continue
-            if line.startswith("TIME="):
-                ts = line.split("=", 1)[1]
-                a, b = ts.split("/")
-                time_sig = (int(a), int(b))
-                continue
-            if line.startswith("PULSES_PER_BEAT="):
-                pulses_per_beat = int(line.split("=", 1)[1])
+            # ヘッダー（"KEY=" の KEY を 1 回切り出して集合で判定し、キーごとの startswith を並べない）
+            key, sep, value = line.partition("=")
+            if sep and key in _HEADER_KEYS:
+                if key == "TITLE":
+                    title = value.strip()
+                elif key == "TEMPO":
+                    tempo = int(value)
+                elif key == "TIME" or key == "PULSES_PER_BEAT":
+                    if key == "TIME":
+                        a, b = value.split("/")
+                        time_sig = (int(a), int(b))
+                    else:
+                        pulses_per_beat = int(value)
+                    note_steps.clear()
+                    if time_sig is not None and pulses_per_beat is not None:
+                        bar_steps = time_sig[0] * pulses_per_beat
+                # FILENAME は Score 側では使わない
                 continue
 
             # トラック行
@@ -294,7 +382,6 @@ class Score:
                     raise ValueError("トラック名が空です。")
 
                 tokens = data.strip().split()
-                bar_steps = time_sig[0] * pulses_per_beat
                 if bar_steps <= 0:
                     raise ValueError("1小節あたりのステップ数(bar_steps) が 0 以下です。")
 
@@ -361,7 +448,6 @@ class Score:
         if not track_events_map:
             raise ValueError("トラック定義が見つかりません。")
 
-        bar_steps = time_sig[0] * pulses_per_beat
         if bar_steps <= 0:
             raise ValueError("1小節あたりのステップ数(bar_steps) が 0 以下です。")
 
@@ -9,7 +9,9 @@ import array
 import math
 import os
 import random
+import sys
 import wave
+from collections import OrderedDict
 
 try:
     import numpy as np  # type: ignore
@@ -22,6 +24,16 @@ except ModuleNotFoundError:  # pragma: no cover - 環境依存
     sa = None
 
 
+# WAV 読み込み時のファイルバッファサイズ
+_WAV_READ_BUFFER = 1 << 20
+
+# デコード済みサンプルのキャッシュ: 絶対パス → (mtime_ns, size, data)
+# 設定保存のたびに同じ WAV を読み直さずに済ませる。一度選んだだけのファイルまで
+# 抱え続けないよう、最近使った _DECODED_WAV_CACHE_SIZE 件（HH / SD / BD ＋α）だけ残す
+_DECODED_WAV_CACHE: "OrderedDict[str, tuple]" = OrderedDict()
+_DECODED_WAV_CACHE_SIZE = 4
+
+
 def _linspace(start: float, stop: float, num: int, endpoint: bool = True):
     if num <= 0:
         return [] if np is None else np.array([], dtype=float)
@@ -81,6 +93,7 @@ class DrumSynth:
         }
 
         self.sound_settings = self._merge_sound_settings(sound_settings)
+        self._rebuild_gain_table()
 
         # サンプルレート（WAV も基本この SR を想定）
         self.sample_rate = 44100
@@ -123,8 +136,27 @@ class DrumSynth:
         return merged
 
     def update_params(self, sound_settings):
-        """設定変更を反映（ベースゲイン・ダイナミクスゲイン）"""
+        """
+        設定変更を反映（ベースゲイン・ダイナミクスゲイン）。
+        変更のあった項目だけを渡してもよい（渡されなかった項目は今の値のまま）。
+        """
+        if isinstance(sound_settings, dict):
+            sound_settings = {**self.sound_settings, **sound_settings}
         self.sound_settings = self._merge_sound_settings(sound_settings)
+        self._rebuild_gain_table()
+
+    def _rebuild_gain_table(self):
+        """
+        [楽器 (HH, SD, BD)][レベル 0〜3] → 音量（ベースゲイン × ダイナミクスゲイン）の表を作る。
+        発音のたびに dict を引いて掛け算しないよう、設定が変わった時だけ作り直す。
+        """
+        settings = self.sound_settings
+        dyn_gain = settings["dyn_gain"]
+        dyn = [dyn_gain.get(level, 1.0) for level in range(4)]
+        self.gain_table = [
+            [settings[key] * g for g in dyn]
+            for key in ("base_gain_hh", "base_gain_sd", "base_gain_bd")
+        ]
 
     # -----------------------------------------------------------
     # WAV 読み込み
@@ -137,30 +169,89 @@ class DrumSynth:
             print(f"[ERROR] WAV not found: {path}")
             return
 
-        with wave.open(path, "rb") as wf:
+        data = self._decode_wav_cached(path)
+
+        if target.upper() == "HH":
+            self.wav_hh = data
+        elif target.upper() == "SD":
+            self.wav_sd = data
+        elif target.upper() == "BD":
+            self.wav_bd = data
+
+        print(f"[INFO] Loaded WAV for {target}: {path}")
+
+    def update_sample_paths(self, sample_paths):
+        """
+        sample_paths : {"HH": path, "SD": path, "BD": path}
+        パスが空の楽器は外部 WAV を外して内蔵シンセに戻す。
+        """
+        for target in ("HH", "SD", "BD"):
+            path = (sample_paths or {}).get(target) or ""
+            if path:
+                try:
+                    self.load_wav(path, target)
+                except (wave.Error, EOFError, OSError) as e:
+                    print(f"[ERROR] WAV load failed for {target}: {path} ({e})")
+            else:
+                setattr(self, "wav_" + target.lower(), None)
+
+    def _decode_wav_cached(self, path: str):
+        """ファイルの更新時刻とサイズが変わっていなければ、前回のデコード結果を返す。"""
+        key = os.path.abspath(path)
+        st = os.stat(key)
+        cached = _DECODED_WAV_CACHE.get(key)
+        if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            _DECODED_WAV_CACHE.move_to_end(key)
+            return cached[2]
+
+        data = self._decode_wav(path)
+        # キャッシュを共有するので書き換え不可にしておく
+        # （numpy が無い時は array("d") を読み取り専用の memoryview で包む。コピーはしない）
+        if np is not None:
+            data.setflags(write=False)
+        else:
+            data = memoryview(data).toreadonly()
+        _DECODED_WAV_CACHE[key] = (st.st_mtime_ns, st.st_size, data)
+        _DECODED_WAV_CACHE.move_to_end(key)
+        while len(_DECODED_WAV_CACHE) > _DECODED_WAV_CACHE_SIZE:
+            _DECODED_WAV_CACHE.popitem(last=False)
+        return data
+
+    def _decode_wav(self, path: str):
+        """WAV を読み込み、モノラル・-1.0〜1.0 の float 列にする。"""
+        # 大きめのバッファで開き、readframes 1 回でまとめて読む
+        with open(path, "rb", buffering=_WAV_READ_BUFFER) as raw_file, wave.open(raw_file, "rb") as wf:
             sr = wf.getframerate()
             if sr != self.sample_rate:
                 print(
                     f"[WARN] WAV {path} has different sample rate ({sr}), "
                     f"expected {self.sample_rate}. ピッチを変えずのリサンプルは未実装です。"
                 )
+            n_channels = wf.getnchannels()
             frames = wf.readframes(wf.getnframes())
             if np is not None:
-                data = np.frombuffer(frames, dtype=np.int16).astype(np.float32)
+                # WAV の PCM はリトルエンディアン固定なので dtype も明示する
+                data = np.frombuffer(frames, dtype="<i2").astype(np.float32)
+                if n_channels > 1:
+                    # インターリーブされた多チャンネルを (frames, ch) に見立てて平均し、モノラル化
+                    data = data[: len(data) - len(data) % n_channels]
+                    data = data.reshape(-1, n_channels).mean(axis=1, dtype=np.float32)
                 data /= 32767.0  # 正規化（-1.0〜1.0）
             else:
                 raw = array.array("h")
                 raw.frombytes(frames)
-                data = [sample / 32767.0 for sample in raw]
-
-        if target.upper() == "HH":
-            self.wav_hh = data
-        elif target.upper() == "SD":
-            self.wav_sd = data
-        elif target.upper() == "BD":
-            self.wav_bd = data
-
-        print(f"[INFO] Loaded WAV for {target}: {path}")
+                if sys.byteorder == "big":
+                    raw.byteswap()
+                # Python の float オブジェクトを並べたリストではなく、型付き配列に詰める
+                if n_channels > 1:
+                    scale = 1.0 / (32767.0 * n_channels)
+                    data = array.array("d", [
+                        sum(raw[i:i + n_channels]) * scale
+                        for i in range(0, len(raw) - n_channels + 1, n_channels)
+                    ])
+                else:
+                    data = array.array("d", [sample / 32767.0 for sample in raw])
+        return data
 
     # -----------------------------------------------------------
     # 内蔵シンセ（WAV が無い場合の fallback）
@@ -262,16 +353,16 @@ class DrumSynth:
                 self._warned_no_audio = True
             return
 
-        # 音量調整
+        # 音量調整 → int16 化（音量と 32767 倍を 1 回の乗算にまとめ、clip 後に一括キャスト）
         if np is not None:
-            w = waveform * volume
-            w = _clip(w, -1.0, 1.0)
-            w16 = (w * 32767).astype(np.int16)
-            raw_buffer = w16
+            w = waveform * (volume * 32767.0)
+            raw_buffer = _clip(w, -32767.0, 32767.0).astype(np.int16)
         else:
-            w = [max(-1.0, min(1.0, float(v) * volume)) for v in waveform]
-            ints = [max(-32768, min(32767, int(val * 32767))) for val in w]
-            raw_buffer = array.array("h", ints)
+            # [-1, 1] に収めた時点で int16 の範囲内なので、2 回目の clamp は不要
+            raw_buffer = array.array(
+                "h",
+                (int(max(-1.0, min(1.0, float(v) * volume)) * 32767) for v in waveform),
+            )
 
         play_obj = sa.play_buffer(
             raw_buffer,
@@ -299,11 +390,11 @@ class DrumSynth:
         ● 各楽器は新しい音が来たらその都度 polyphonic で重ねる
         """
 
-        dyn_gain = self.sound_settings["dyn_gain"]
+        gain_hh, gain_sd, gain_bd = self.gain_table
 
         # ハイハット
         if hh_level > 0:
-            vol = self.sound_settings["base_gain_hh"] * dyn_gain.get(hh_level, 1.0)
+            vol = gain_hh[hh_level] if hh_level < 4 else self.sound_settings["base_gain_hh"]
             if self.wav_hh is not None:
                 self._play_sample(self.wav_hh, vol)
             else:
@@ -311,7 +402,7 @@ class DrumSynth:
 
         # スネア
         if sd_level > 0:
-            vol = self.sound_settings["base_gain_sd"] * dyn_gain.get(sd_level, 1.0)
+            vol = gain_sd[sd_level] if sd_level < 4 else self.sound_settings["base_gain_sd"]
             if self.wav_sd is not None:
                 self._play_sample(self.wav_sd, vol)
             else:
@@ -319,7 +410,7 @@ class DrumSynth:
 
         # バスドラム
         if bd_level > 0:
-            vol = self.sound_settings["base_gain_bd"] * dyn_gain.get(bd_level, 1.0)
+            vol = gain_bd[bd_level] if bd_level < 4 else self.sound_settings["base_gain_bd"]
             if self.wav_bd is not None:
                 # 外部 WAV を使う場合も、長さはそのまま・ピッチもそのまま
                 self._play_sample(self.wav_bd, vol)
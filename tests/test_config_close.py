@@ -0,0 +1,139 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import config
+import gui_app
+from gui_app import DrumApp
+
+
+class _FakeRoot:
+    def __init__(self, geometry: str):
+        self._geometry = geometry
+
+    def winfo_geometry(self) -> str:
+        return self._geometry
+
+    def after_cancel(self, _after_id):
+        pass
+
+    def destroy(self):
+        pass
+
+
+class _ConfigOnlyApp:
+    """DrumApp の設定読み込み・終了処理だけを Tk 無しで動かすための器。"""
+
+    _load_sound_settings = DrumApp._load_sound_settings
+    _merge_sound_settings = DrumApp._merge_sound_settings
+    _set_config = DrumApp._set_config
+    _snapshot_config = DrumApp._snapshot_config
+    on_close = DrumApp.on_close
+
+    def __init__(self, config_data: dict):
+        self.config_data = config_data
+        self.root = _FakeRoot(config_data.get("main_geometry", "800x380+100+100"))
+        self.save_dir = config_data["save_dir"]
+        self.movie_output_dir = config_data["movie_output_dir"]
+        self.loop_record_count = int(config_data["loop_record_count"])
+        self.loop_playback = bool(config_data["loop_playback"])
+        self.sample_paths = config_data["sample_paths"]
+        self.last_filepath = config_data.get("last_file")
+        self.text_input_window = None
+        self._config_dirty = False
+        self._config_after_id = None
+        self._export_busy = False
+        self._worker_poll_id = None
+        self._load_sound_settings()
+
+    def _stop_audio_thread(self):
+        pass
+
+
+class ConfigCloseTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._patch = mock.patch.object(
+            config, "CONFIG_FILE", os.path.join(self._tmpdir.name, "drum_app_config.json")
+        )
+        self._patch.start()
+        config._CACHE.clear()
+
+    def tearDown(self):
+        self._patch.stop()
+        config._CACHE.clear()
+        self._tmpdir.cleanup()
+
+    def test_close_without_edits_does_not_write(self):
+        # 前回終了時に保存された形（dyn_gain のキーは JSON なので文字列）
+        saved = {
+            "main_geometry": "800x380+100+100",
+            "sound_settings": {
+                "base_gain_hh": 0.4,
+                "base_gain_sd": 0.3,
+                "base_gain_bd": 0.8,
+                "dyn_gain": {"0": 0.0, "1": 0.4, "2": 0.8, "3": 1.1},
+            },
+            "save_dir": "data",
+            "movie_output_dir": "Mov",
+            "loop_record_count": 1,
+            "loop_playback": False,
+            "sample_paths": {"HH": "", "SD": "", "BD": ""},
+        }
+        with open(config.CONFIG_FILE, "w", encoding="utf-8") as f:
+            json.dump(saved, f, ensure_ascii=False, indent=2)
+
+        app = _ConfigOnlyApp(config.load_config())
+        with mock.patch.object(gui_app, "save_config") as save_config:
+            app.on_close()
+
+        save_config.assert_not_called()
+        self.assertFalse(app._config_dirty)
+
+    def test_close_after_edit_writes(self):
+        saved = {
+            "sound_settings": {"dyn_gain": {"1": 0.4}},
+            "save_dir": "data",
+            "movie_output_dir": "Mov",
+            "loop_record_count": 1,
+            "loop_playback": False,
+            "sample_paths": {"HH": "", "SD": "", "BD": ""},
+        }
+        with open(config.CONFIG_FILE, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+
+        app = _ConfigOnlyApp(config.load_config())
+        app.loop_record_count = 3
+        with mock.patch.object(gui_app, "save_config") as save_config:
+            app.on_close()
+
+        save_config.assert_called_once()
+        self.assertEqual(save_config.call_args[0][0]["loop_record_count"], 3)
+
+    def test_close_during_wav_export_is_refused(self):
+        saved = {
+            "save_dir": "data",
+            "movie_output_dir": "Mov",
+            "loop_record_count": 1,
+            "loop_playback": False,
+            "sample_paths": {"HH": "", "SD": "", "BD": ""},
+        }
+        with open(config.CONFIG_FILE, "w", encoding="utf-8") as f:
+            json.dump(saved, f)
+
+        app = _ConfigOnlyApp(config.load_config())
+        app._export_busy = True
+        with mock.patch.object(gui_app, "save_config") as save_config, \
+                mock.patch.object(gui_app.messagebox, "showinfo") as showinfo, \
+                mock.patch.object(app.root, "destroy") as destroy:
+            app.on_close()
+
+        showinfo.assert_called_once()
+        destroy.assert_not_called()
+        save_config.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()